@@ -249,6 +249,7 @@
 # backend/app.py
 import os
 import datetime
+import logging
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
 
@@ -258,12 +259,14 @@ import pymysql
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import create_access_token
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
 
 # ---------------------------------------------------
 # App setup
 # ---------------------------------------------------
 app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=["X-Next-Cursor", "X-Cache", "X-Request-ID"])
 
 # ---------------------------------------------------
 # Database config (FORCE TCP)
@@ -281,15 +284,23 @@ app.config["SQLALCHEMY_DATABASE_URI"] = (
     f"@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+# Connection pool. Instead of pool_pre_ping (a round trip on every
+# checkout), connections idle longer than DB_POOL_IDLE_PING_SECONDS are
+# pinged on checkout and pool_recycle retires them before MySQL's
+# wait_timeout. LIFO reuse keeps the busy connections warm.
+from utils.db_pool import MonitoredQueuePool
+app.config["DB_POOL_IDLE_PING_SECONDS"] = int(os.environ.get("DB_POOL_IDLE_PING_SECONDS", "30"))
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
+    "poolclass": MonitoredQueuePool,
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "300")),
+    "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "false").lower() == "true",
+    "pool_use_lifo": os.environ.get("DB_POOL_USE_LIFO", "true").lower() == "true",
 }
 
-print("=" * 50)
-print("DATABASE URI:", app.config["SQLALCHEMY_DATABASE_URI"])
-print("=" * 50)
-
 # ---------------------------------------------------
 # JWT config
 # ---------------------------------------------------
@@ -298,6 +309,87 @@ app.config["JWT_SECRET_KEY"] = os.environ.get(
 )
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = datetime.timedelta(hours=24)
 
+# ---------------------------------------------------
+# Password hashing
+# ---------------------------------------------------
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.environ.get("BCRYPT_LOG_ROUNDS", "12"))
+app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", "0")) or None
+app.config["PASSWORD_HASH_QUEUE_LIMIT"] = (
+    int(os.environ["PASSWORD_HASH_QUEUE_LIMIT"]) if os.environ.get("PASSWORD_HASH_QUEUE_LIMIT") else None
+)
+app.config["PASSWORD_HASH_RETRY_AFTER"] = int(os.environ.get("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+# ---------------------------------------------------
+# Pagination
+# ---------------------------------------------------
+app.config["RECIPIENTS_PAGE_SIZE"] = int(os.environ.get("RECIPIENTS_PAGE_SIZE", "50"))
+app.config["RECIPIENTS_MAX_PAGE_SIZE"] = int(os.environ.get("RECIPIENTS_MAX_PAGE_SIZE", "200"))
+
+# ---------------------------------------------------
+# Search cache (CACHE_BACKEND=redis shares it between workers)
+# ---------------------------------------------------
+app.config["CACHE_ENABLED"] = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
+app.config["CACHE_BACKEND"] = os.environ.get("CACHE_BACKEND", "memory")
+app.config["CACHE_REDIS_URL"] = os.environ.get("CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+app.config["CACHE_TTL_SECONDS"] = int(os.environ.get("CACHE_TTL_SECONDS", "30"))
+app.config["CACHE_MAX_ENTRIES"] = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+
+# ---------------------------------------------------
+# List serialization (column tuples + orjson when installed;
+# clients can send "X-Serializer: orm" for the ORM path)
+# ---------------------------------------------------
+app.config["FAST_SERIALIZATION"] = os.environ.get("FAST_SERIALIZATION", "true").lower() == "true"
+# Rows per server-side cursor fetch for "Accept: application/x-ndjson" exports
+app.config["STREAM_BATCH_SIZE"] = int(os.environ.get("STREAM_BATCH_SIZE", "500"))
+
+# ---------------------------------------------------
+# Nearest-neighbour search (most index points one /nearby call may scan
+# while looking for k rows that pass its filters)
+# ---------------------------------------------------
+app.config["NEARBY_MAX_CANDIDATES"] = int(os.environ.get("NEARBY_MAX_CANDIDATES", "5000"))
+
+# ---------------------------------------------------
+# Delta sync (/api/sync re-reads this many seconds before since=)
+# ---------------------------------------------------
+app.config["SYNC_OVERLAP_SECONDS"] = int(os.environ.get("SYNC_OVERLAP_SECONDS", "5"))
+
+# ---------------------------------------------------
+# Blood-stock endpoints (user -> bank map lifetime)
+# ---------------------------------------------------
+app.config["BANK_LOOKUP_TTL_SECONDS"] = int(os.environ.get("BANK_LOOKUP_TTL_SECONDS", "60"))
+
+# ---------------------------------------------------
+# Cities (autocomplete array rebuild interval)
+# ---------------------------------------------------
+app.config["CITY_INDEX_MAX_AGE_SECONDS"] = int(os.environ.get("CITY_INDEX_MAX_AGE_SECONDS", "300"))
+
+# ---------------------------------------------------
+# Offline geocoding (gazetteer built by build_gazetteer.py)
+# ---------------------------------------------------
+app.config["GEO_GAZETTEER_PATH"] = os.environ.get(
+    "GEO_GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer")
+)
+app.config["GEO_REVERSE_MAX_KM"] = float(os.environ.get("GEO_REVERSE_MAX_KM", "50"))
+app.config["GEO_DEFAULT_COUNTRY"] = os.environ.get("GEO_DEFAULT_COUNTRY") or None
+
+# ---------------------------------------------------
+# Live events (EVENTS_REDIS_URL fans out across workers)
+# ---------------------------------------------------
+app.config["EVENTS_REDIS_URL"] = os.environ.get("EVENTS_REDIS_URL")
+app.config["EVENTS_KEEPALIVE_SECONDS"] = int(os.environ.get("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+# ---------------------------------------------------
+# Logging (JSON lines on stdout; LOG_LEVEL=DEBUG adds payload dumps)
+# ---------------------------------------------------
+app.config["LOG_LEVEL"] = os.environ.get("LOG_LEVEL", "INFO").upper()
+app.config["LOG_INFO_SAMPLE_RATE"] = float(os.environ.get("LOG_INFO_SAMPLE_RATE", "1.0"))
+
+# ---------------------------------------------------
+# Metrics (Prometheus text on /api/metrics)
+# ---------------------------------------------------
+app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+app.config["METRICS_QUERY_THRESHOLD"] = int(os.environ.get("METRICS_QUERY_THRESHOLD", "20"))
+
 # ---------------------------------------------------
 # Extensions
 # ---------------------------------------------------
@@ -306,6 +398,39 @@ db.init_app(app)
 bcrypt.init_app(app)
 jwt.init_app(app)
 
+from utils.cache import response_cache
+response_cache.init_app(app)
+
+from utils.events import event_broker
+event_broker.init_app(app)
+
+from utils.password_hashing import password_pool, HashingPoolBusy
+password_pool.init_app(app)
+
+from utils.bank_lookup import bank_lookup
+bank_lookup.init_app(app)
+
+from utils.city_index import city_index
+city_index.init_app(app)
+
+from utils.geocoder import gazetteer
+from utils.location_helper import parse_point
+gazetteer.init_app(app)
+
+from utils.logging_setup import init_logging, get_logger
+init_logging(app)
+auth_logger = get_logger("auth")
+# Which database this process talks to, without the password
+get_logger("db").debug("database configured", extra={"fields": {
+    "uri": make_url(app.config["SQLALCHEMY_DATABASE_URI"]).render_as_string(hide_password=True),
+}})
+
+from utils.metrics import request_metrics
+request_metrics.init_app(app)
+
+from utils.db_pool import pool_monitor
+pool_monitor.init_app(app, db, metrics=request_metrics)
+
 # ---------------------------------------------------
 # Models (Imported to ensure registration)
 # ---------------------------------------------------
@@ -318,11 +443,22 @@ from routes.donor_routes import donor_bp
 from routes.recipient_routes import recipient_bp
 from routes.blood_bank_routes import blood_bank_bp
 from routes.blood_stock_routes import blood_stock_bp
+from routes.match_routes import match_bp
+from routes.event_routes import event_bp
+from routes.sync_routes import sync_bp
+from routes.city_routes import city_bp
+from routes.geo_routes import geo_bp
+from utils.spatial_index import donor_index, blood_bank_index
 
 app.register_blueprint(donor_bp, url_prefix='/api/donors')
 app.register_blueprint(recipient_bp, url_prefix='/api/recipients')
 app.register_blueprint(blood_bank_bp, url_prefix='/api/bloodbanks')
 app.register_blueprint(blood_stock_bp, url_prefix='/api/blood-stock')
+app.register_blueprint(match_bp, url_prefix='/api/match')
+app.register_blueprint(event_bp, url_prefix='/api/events')
+app.register_blueprint(sync_bp, url_prefix='/api/sync')
+app.register_blueprint(city_bp, url_prefix='/api/cities')
+app.register_blueprint(geo_bp, url_prefix='/api/geo')
 
 # ---------------------------------------------------
 # Ensure database exists
@@ -366,6 +502,13 @@ def internal_error(error):
     db.session.rollback()
     return jsonify({"msg": "Internal server error"}), 500
 
+@app.errorhandler(HashingPoolBusy)
+def hashing_busy(error):
+    db.session.rollback()
+    response = jsonify({"msg": "Server is busy, please retry shortly"})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
 # ---------------------------------------------------
 # Routes
 # ---------------------------------------------------
@@ -378,6 +521,14 @@ def ping():
         "timestamp": datetime.datetime.utcnow().isoformat()
     }), 200
 
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(response_cache.stats()), 200
+
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    return request_metrics.response()
+
 # ---------------------------------------------------
 # Auth Routes
 # ---------------------------------------------------
@@ -520,32 +671,49 @@ def register():
         latitude = data.get("latitude")
         longitude = data.get("longitude")
 
-        print(f"📝 Registration attempt:")
-        print(f"   Username: {username}")
-        print(f"   Email: {email}")
-        print(f"   Role: {role}")
-        print(f"   Blood Group: {blood_group}")
-        print(f"   City: {city}")
-        print(f"   Location: ({latitude}, {longitude})")
+        auth_logger.info("registration attempt", extra={"sampled": True, "fields": {
+            "role": role,
+            "bloodGroup": blood_group,
+            "city": city,
+            "hasLocation": latitude is not None and longitude is not None,
+        }})
+        if auth_logger.isEnabledFor(logging.DEBUG):
+            auth_logger.debug("registration payload", extra={"fields": {
+                "payload": {key: value for key, value in data.items() if key != "password"},
+            }})
 
         # Validation
         if not username or not email or not password:
             return jsonify({"msg": "Username, email, and password required"}), 400
 
+        # Login tells emails from usernames by the "@"
+        if "@" in username:
+            return jsonify({"msg": "Username cannot contain '@'"}), 400
+
         # Blood group validation for donor and recipient
         if role in ['donor', 'recipient'] and not blood_group:
             return jsonify({"msg": f"Blood group is required for {role}s"}), 400
 
-        # Check for existing user
-        existing_user = User.query.filter(
-            (User.username == username.lower()) | (User.email == email)
-        ).first()
-        
-        if existing_user:
-            print(f"⚠️ User already exists: {username}")
-            return jsonify({"msg": "User already exists"}), 409
+        # Coordinates are optional but must be a real point when sent;
+        # float() alone accepts "nan" and "inf"
+        try:
+            latitude, longitude = parse_point(latitude, longitude)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+
+        # Clients send free text and/or device coordinates; settle both on
+        # the gazetteer's city and fill in whichever is missing
+        if role in ['donor', 'recipient', 'bank']:
+            city, latitude, longitude = gazetteer.fill_location(
+                city, latitude, longitude, app.config.get("GEO_DEFAULT_COUNTRY")
+            )
 
-        # Create user
+        # Resolved before the user is added: a new city is inserted here,
+        # and a pending user must not be flushed early by that query
+        city_id = city_index.resolve(city) if role in ('donor', 'recipient', 'bank') else None
+
+        # Create user. Uniqueness of username/email is enforced by their
+        # unique indexes at commit time rather than by a pre-read.
         user = User(
             username=username.lower(),
             email=email,
@@ -555,9 +723,6 @@ def register():
         user.set_password(password)
         
         db.session.add(user)
-        db.session.flush()  # Get user.id without committing
-        
-        print(f"✅ User created with ID: {user.id}")
 
         # Create role-specific profile
         if role == 'donor':
@@ -566,72 +731,86 @@ def register():
                 return jsonify({"msg": "Blood group required for donors"}), 400
                 
             donor = Donor(
-                user_id=user.id,
+                user=user,
                 name=username,
                 blood_group=blood_group,
                 phone=phone,
                 city=city,
+                city_id=city_id,
                 availability_status=True,
-                latitude=float(latitude) if latitude else None,
-                longitude=float(longitude) if longitude else None
+                latitude=latitude,
+                longitude=longitude
             )
             db.session.add(donor)
-            print(f"✅ Donor profile created for user {user.id}")
 
         elif role == 'recipient':
             if not blood_group:
                 db.session.rollback()
                 return jsonify({"msg": "Blood group required for recipients"}), 400
-            
-            print(f"🔍 Creating recipient profile:")
-            print(f"   user_id: {user.id}")
-            print(f"   name: {username}")
-            print(f"   required_blood_group: {blood_group}")
-            print(f"   phone: {phone}")
-            print(f"   city: {city}")
-            print(f"   latitude: {latitude}")
-            print(f"   longitude: {longitude}")
-                
+
             recipient = Recipient(
-                user_id=user.id,
+                user=user,
                 name=username,
                 required_blood_group=blood_group,
                 phone=phone,
                 city=city,
+                city_id=city_id,
                 urgency_level='Medium',
-                latitude=float(latitude) if latitude else None,
-                longitude=float(longitude) if longitude else None
+                latitude=latitude,
+                longitude=longitude
             )
             db.session.add(recipient)
-            print(f"✅ Recipient profile created for user {user.id}")
 
         elif role == 'bank':
             bank = BloodBank(
                 name=username,
                 city=city,
+                city_id=city_id,
                 contact_number=phone,
-                created_by=user.id,
-                latitude=float(latitude) if latitude else None,
-                longitude=float(longitude) if longitude else None
+                owner=user,
+                latitude=latitude,
+                longitude=longitude
             )
             db.session.add(bank)
-            print(f"✅ Blood bank profile created for user {user.id}")
 
         # Commit everything
         db.session.commit()
-        print(f"🎉 Registration successful for {username} (ID: {user.id}, Role: {role})")
+        if role == 'donor':
+            donor_index.upsert(donor.id, donor.latitude, donor.longitude)
+            response_cache.invalidate("donors")
+        elif role == 'bank':
+            blood_bank_index.upsert(bank.id, bank.latitude, bank.longitude)
+            response_cache.invalidate("bloodbanks")
+        auth_logger.info("registration succeeded", extra={"sampled": True, "fields": {
+            "userId": user.id,
+            "role": role,
+        }})
 
         return jsonify({
             "msg": "Registration successful",
             "user": user.to_dict()
         }), 201
 
+    except IntegrityError as e:
+        db.session.rollback()
+        field = User.duplicate_field(e)
+        if field is None:
+            # Not a duplicate account; report it like any other failure
+            auth_logger.exception("registration failed")
+            return jsonify({
+                "msg": "Registration failed",
+                "error": str(e),
+                "type": type(e).__name__
+            }), 500
+        auth_logger.warning("registration rejected: duplicate", extra={"fields": {"field": field}})
+        return jsonify({"msg": "User already exists", "field": field}), 409
+    except HashingPoolBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
-        print(f"❌ REGISTRATION ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
+        auth_logger.exception("registration failed")
+
         # Return detailed error for debugging
         return jsonify({
             "msg": "Registration failed",
@@ -652,13 +831,21 @@ def login():
     ).strip().lower()
     password = data.get("password") or ""
 
-    user = User.query.filter(
-        (User.username == identifier) | (User.email == identifier)
-    ).first()
+    user = User.find_by_identifier(identifier)
     
     if not user or not user.check_password(password):
         return jsonify({"msg": "Invalid credentials"}), 401
 
+    # Upgrade hashes made with an old cost factor while we know the password
+    if user.needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except HashingPoolBusy:
+            db.session.rollback()  # try again on a later login
+        except Exception:
+            db.session.rollback()
+
     access_token = create_access_token(
         identity=str(user.id), 
         additional_claims={
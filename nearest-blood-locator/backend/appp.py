@@ -10,6 +10,7 @@ import pymysql
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import create_access_token
+from sqlalchemy.exc import IntegrityError
 
 # ---------------------------------------------------
 # App setup
@@ -172,15 +173,9 @@ def register():
     if not username or not email or not password:
         return jsonify({"msg": "Username, email, and password required"}), 400
 
-    # Check for existing username
-    existing_username = User.query.filter_by(username=username).first()
-    if existing_username:
-        return jsonify({"msg": f"Username '{username}' is already taken"}), 409
-    
-    # Check for existing email
-    existing_email = User.query.filter_by(email=email).first()
-    if existing_email:
-        return jsonify({"msg": f"Email '{email}' is already registered"}), 409
+    # Login tells emails from usernames by the "@"
+    if "@" in username:
+        return jsonify({"msg": "Username cannot contain '@'"}), 400
 
     print("Creating User object...")
     user = User(username=username, email=email, phone=phone, role=role)
@@ -188,8 +183,6 @@ def register():
 
     try:
         db.session.add(user)
-        db.session.flush()  # Get the user.id without committing
-        print(f"User created with ID: {user.id}")
 
         # Create profile record based on role WITH latitude/longitude
         if role == 'donor':
@@ -201,7 +194,7 @@ def register():
                 return jsonify({"msg": "Blood group is required for donors"}), 400
             
             donor_data = {
-                'user_id': user.id,
+                'user': user,
                 'name': username,
                 'blood_group': blood_group,
                 'phone': phone,
@@ -225,7 +218,7 @@ def register():
                 return jsonify({"msg": "Blood group is required for recipients"}), 400
             
             recipient_data = {
-                'user_id': user.id,
+                'user': user,
                 'name': username,
                 'required_blood_group': blood_group,
                 'phone': phone,
@@ -251,7 +244,7 @@ def register():
                 'name': username,
                 'city': city,
                 'contact_number': phone,
-                'created_by': user.id,
+                'owner': user,
                 'latitude': latitude,
                 'longitude': longitude
             }
@@ -266,6 +259,13 @@ def register():
         print("✓ Registration successful!")
         
         return jsonify({"msg": "Registration successful", "user": user.to_dict()}), 201
+
+    except IntegrityError as e:
+        # Username/email uniqueness is enforced by the unique indexes
+        db.session.rollback()
+        if User.duplicate_field(e) == "email":
+            return jsonify({"msg": f"Email '{email}' is already registered"}), 409
+        return jsonify({"msg": f"Username '{username}' is already taken"}), 409
         
     except Exception as e:
         db.session.rollback()
@@ -293,7 +293,7 @@ def login():
     identifier = (data.get("username") or data.get("identifier") or data.get("email") or "").strip().lower()
     password = data.get("password") or ""
 
-    user = User.query.filter((User.username == identifier) | (User.email == identifier)).first()
+    user = User.find_by_identifier(identifier)
     if not user or not user.check_password(password):
         return jsonify({"msg": "Invalid credentials"}), 401
 
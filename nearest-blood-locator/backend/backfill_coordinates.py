@@ -0,0 +1,53 @@
+# Fill in missing latitude/longitude from each record's city
+# Uses the offline gazetteer (GEO_GAZETTEER_PATH, see build_gazetteer.py);
+# records get their city's centre, which is enough for radius searches.
+# Run with: python backfill_coordinates.py [--dry-run]
+
+import sys
+
+from sqlalchemy import or_
+
+from app import app, db
+from models import Donor, Recipient, BloodBank
+from utils.geocoder import gazetteer
+
+MODELS = [Donor, Recipient, BloodBank]
+
+dry_run = "--dry-run" in sys.argv
+
+with app.app_context():
+    if not gazetteer.loaded:
+        print(f"❌ No gazetteer at {app.config['GEO_GAZETTEER_PATH']}; run build_gazetteer.py first.")
+        sys.exit(1)
+
+    country = app.config.get("GEO_DEFAULT_COUNTRY")
+    for model in MODELS:
+        missing = or_(model.latitude.is_(None), model.longitude.is_(None))
+        cities = db.session.execute(
+            db.select(model.city).where(missing, model.city != "").distinct()
+        ).scalars().all()
+
+        filled = 0
+        unknown = []
+        for city in cities:
+            place = gazetteer.forward(city, country)
+            if place is None:
+                unknown.append(city)
+                continue
+            # One UPDATE per distinct spelling rather than per row
+            result = db.session.execute(
+                db.update(model)
+                .where(missing, model.city == city)
+                .values(latitude=place.latitude, longitude=place.longitude)
+            )
+            filled += result.rowcount
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        print(f"✅ {model.__tablename__}: {filled} rows {'would be ' if dry_run else ''}filled "
+              f"from {len(cities) - len(unknown)} cities")
+        if unknown:
+            print(f"⚠️ Not in the gazetteer: {', '.join(sorted(unknown)[:20])}"
+                  f"{' ...' if len(unknown) > 20 else ''}")
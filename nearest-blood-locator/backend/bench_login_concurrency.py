@@ -0,0 +1,79 @@
+# Benchmark: login latency under a concurrent login storm
+# Compares hashing inline on request threads with the bounded hashing pool,
+# while a light "ping" task measures how responsive everything else stays.
+# Run with: python bench_login_concurrency.py [cost] [concurrency] [logins]
+
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from utils.password_hashing import HashingPool, HashingPoolBusy
+
+COST = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+LOGINS = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+PASSWORD = b"correct horse battery staple"
+HASH = bcrypt.hashpw(PASSWORD, bcrypt.gensalt(COST))
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def ping_probe(stop, samples):
+    # Stands in for /api/ping and cheap searches sharing the machine
+    while not stop.is_set():
+        start = time.perf_counter()
+        sum(range(2000))
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.005)
+
+def run(label, check):
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def login():
+        start = time.perf_counter()
+        try:
+            check()
+        except HashingPoolBusy:
+            with lock:
+                rejected[0] += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    stop = threading.Event()
+    pings = []
+    probe = threading.Thread(target=ping_probe, args=(stop, pings))
+    probe.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as request_threads:
+        for _ in range(LOGINS):
+            request_threads.submit(login)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    probe.join()
+
+    print(f"\n{label}")
+    print(f"  completed {len(latencies)}  rejected (503) {rejected[0]}  in {elapsed:.2f} s")
+    print(f"  login  p50 {percentile(latencies, 50):8.1f} ms   p95 {percentile(latencies, 95):8.1f} ms")
+    print(f"  ping   p50 {statistics.median(pings):8.3f} ms   p95 {percentile(pings, 95):8.3f} ms")
+
+if __name__ == "__main__":
+    print(f"bcrypt cost {COST}, {CONCURRENCY} concurrent request threads, {LOGINS} logins")
+
+    run("Inline hashing on request threads", lambda: bcrypt.checkpw(PASSWORD, HASH))
+
+    pool = HashingPool()
+    print(f"\n(pool: {pool.workers} workers, queue limit {pool.queue_limit})")
+    run("Bounded hashing pool", lambda: pool.run(bcrypt.checkpw, PASSWORD, HASH))
@@ -0,0 +1,74 @@
+# Load test: request throughput vs. connection pool size
+# Each simulated request checks out a connection, runs a query and holds
+# the connection for a little app work, like a Flask view does.
+# Uses the database configured for app.py unless BENCH_DB_URL is set.
+# Run with: python bench_pool.py [threads] [requests_per_thread] [hold_ms]
+
+import os
+import sys
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from utils.db_pool import MonitoredQueuePool, pool_monitor
+
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+HOLD_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+POOL_SIZES = [1, 2, 5, 10, 20, 40]
+
+def database_url():
+    if os.environ.get("BENCH_DB_URL"):
+        return os.environ["BENCH_DB_URL"]
+    from app import app
+    return app.config["SQLALCHEMY_DATABASE_URI"]
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else float("nan")
+
+def run(url, pool_size, pre_ping):
+    engine = create_engine(
+        url, poolclass=MonitoredQueuePool, pool_size=pool_size,
+        max_overflow=0, pool_timeout=60, pool_pre_ping=pre_ping,
+    )
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(REQUESTS):
+            start = time.perf_counter()
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1")).scalar()
+                time.sleep(HOLD_MS / 1000)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    with engine.connect():
+        pass  # open one connection up front so connect cost is not timed
+    waits_before = pool_monitor.stats()
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    waits = pool_monitor.stats()
+    engine.dispose()
+
+    checkouts = waits["checkouts"] - waits_before["checkouts"]
+    mean_wait = (waits["waitSeconds"] - waits_before["waitSeconds"]) / max(1, checkouts) * 1000
+    label = "pre_ping" if pre_ping else "idle ping"
+    print(f"pool {pool_size:>3} {label:<9} {len(latencies) / elapsed:9.0f} req/s   "
+          f"p50 {percentile(latencies, 50):7.1f} ms   p95 {percentile(latencies, 95):7.1f} ms   "
+          f"mean wait {mean_wait:7.2f} ms")
+
+if __name__ == "__main__":
+    url = database_url()
+    print(f"{THREADS} threads x {REQUESTS} requests, {HOLD_MS} ms held per request")
+    for size in POOL_SIZES:
+        run(url, size, pre_ping=False)
+    # pre_ping's extra round trip on every checkout, at a mid-sized pool
+    run(url, 10, pre_ping=True)
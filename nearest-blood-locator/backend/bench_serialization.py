@@ -0,0 +1,81 @@
+# Benchmark: donor list serialization, ORM + to_dict + jsonify vs column tuples + fast JSON
+# Seeds donors into the database configured for app.py and removes them afterwards.
+# Run with: python bench_serialization.py [donors] [repeats]
+
+import json
+import sys
+import time
+import uuid
+
+from flask import jsonify
+
+from app import app, db
+from models import User, Donor
+from utils import serialization
+
+DONORS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+REPEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+
+def seed(tag):
+    users = [
+        {"username": f"bench_{tag}_{i}", "email": f"bench_{tag}_{i}@bench.local",
+         "phone": "0", "role": "donor", "password_hash": "x"}
+        for i in range(DONORS)
+    ]
+    db.session.execute(db.insert(User), users)
+    ids = db.session.scalars(
+        db.select(User.id).where(User.username.startswith(f"bench_{tag}_", autoescape=True))
+    ).all()
+    db.session.execute(db.insert(Donor), [
+        {"user_id": user_id, "name": f"Donor {i}", "blood_group": GROUPS[i % 8], "age": 20 + i % 40,
+         "phone": "0", "city": "Bench", "latitude": 18.0 + (i % 1000) / 1000,
+         "longitude": 73.0 + (i % 997) / 1000, "availability_status": i % 3 != 0}
+        for i, user_id in enumerate(ids)
+    ])
+    db.session.commit()
+
+def cleanup():
+    ids = db.session.scalars(
+        db.select(User.id).where(User.username.startswith("bench_", autoescape=True))
+    ).all()
+    if ids:
+        Donor.query.filter(Donor.user_id.in_(ids)).delete(synchronize_session=False)
+        User.query.filter(User.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+def orm_path():
+    donors = Donor.query.filter_by(city="Bench").all()
+    return jsonify([d.to_dict() for d in donors]).get_data()
+
+def tuple_path():
+    rows = Donor.list_rows.serialize(Donor.query.filter_by(city="Bench"))
+    return serialization.dumps(rows)
+
+def tuple_path_stdlib():
+    rows = Donor.list_rows.serialize(Donor.query.filter_by(city="Bench"))
+    return json.dumps(rows, default=serialization._default, sort_keys=True, separators=(",", ":")).encode()
+
+def run(label, build):
+    timings = []
+    for _ in range(REPEATS):
+        db.session.expunge_all()  # every request starts with an empty identity map
+        start = time.perf_counter()
+        body = build()
+        timings.append(time.perf_counter() - start)
+    best = min(timings) * 1000
+    print(f"{label:<34} best {best:8.1f} ms   {len(body) / 1024:8.0f} KiB")
+    return body
+
+if __name__ == "__main__":
+    print(f"{DONORS} donors, best of {REPEATS}; orjson {'installed' if serialization.orjson else 'not installed'}")
+    with app.app_context():
+        cleanup()
+        try:
+            seed(uuid.uuid4().hex[:6])
+            orm = run("ORM objects + to_dict + jsonify", orm_path)
+            stdlib = run("column tuples + json", tuple_path_stdlib)
+            fast = run("column tuples + fast encoder", tuple_path)
+            assert json.loads(orm) == json.loads(stdlib) == json.loads(fast), "outputs differ"
+        finally:
+            cleanup()
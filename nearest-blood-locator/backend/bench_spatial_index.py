@@ -0,0 +1,73 @@
+# Benchmark: grid spatial index vs brute-force Haversine scan
+# Run with: python bench_spatial_index.py
+
+import random
+import time
+
+import numpy as np
+
+from utils.location_helper import calculate_distance, haversine_distances
+from utils.spatial_index import GridIndex
+
+SIZES = [10_000, 100_000, 1_000_000]
+RADIUS_KM = 10
+K = 10
+QUERIES = 50
+BRUTE_QUERIES = 3  # the scalar scan is slow at 1M points
+
+# Roughly the bounding box of India
+LAT_RANGE = (8.0, 32.0)
+LON_RANGE = (68.0, 92.0)
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def run(size):
+    rng = np.random.default_rng(42)
+    lats = rng.uniform(*LAT_RANGE, size)
+    lons = rng.uniform(*LON_RANGE, size)
+
+    index = GridIndex()
+    start = time.perf_counter()
+    index.bulk_load(zip(range(size), lats.tolist(), lons.tolist()))
+    build_ms = (time.perf_counter() - start) * 1000
+
+    origins = [(random.uniform(*LAT_RANGE), random.uniform(*LON_RANGE)) for _ in range(QUERIES)]
+    origin = origins[0]
+    points = list(zip(lats.tolist(), lons.tolist()))
+
+    def brute_scalar():
+        return [
+            i for i, (lat, lon) in enumerate(points)
+            if calculate_distance(origin[0], origin[1], lat, lon) <= RADIUS_KM
+        ]
+
+    def brute_vector():
+        return np.flatnonzero(haversine_distances(origin[0], origin[1], lats, lons) <= RADIUS_KM)
+
+    it = iter(origins * 2)
+
+    def grid_radius():
+        lat, lon = next(it)
+        return index.within_radius(lat, lon, RADIUS_KM)
+
+    it_knn = iter(origins * 2)
+
+    def grid_knn():
+        lat, lon = next(it_knn)
+        return index.nearest(lat, lon, K)
+
+    print(f"\n{size:>9,} points  (index build {build_ms:.0f} ms)")
+    print(f"  brute-force scalar radius  {timed(brute_scalar, BRUTE_QUERIES):10.3f} ms/query")
+    print(f"  brute-force NumPy radius   {timed(brute_vector, QUERIES):10.3f} ms/query")
+    print(f"  grid index radius          {timed(grid_radius, QUERIES):10.3f} ms/query")
+    print(f"  grid index {K}-nearest       {timed(grid_knn, QUERIES):10.3f} ms/query")
+
+if __name__ == "__main__":
+    random.seed(7)
+    print(f"Radius {RADIUS_KM} km, k={K}")
+    for size in SIZES:
+        run(size)
@@ -0,0 +1,104 @@
+# Compile a GeoNames cities dump into the gazetteer used by /api/geo
+# Download e.g. https://download.geonames.org/export/dump/cities1000.zip
+# (or IN.zip for one country), unzip, then run:
+#   python build_gazetteer.py cities1000.txt [out_dir] [--countries IN,NP] [--min-population 1000]
+# Point GEO_GAZETTEER_PATH at out_dir (default: data/gazetteer).
+
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from models.city import normalize_city
+
+CELL_SIZE_DEG = 0.25
+
+# GeoNames dump columns we read
+NAME, ASCII_NAME, ALTERNATE_NAMES, LAT, LON, FEATURE_CLASS, COUNTRY, POPULATION = 1, 2, 3, 4, 5, 6, 8, 14
+
+def read_places(path, countries, min_population, alternates):
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) <= POPULATION or columns[FEATURE_CLASS] != "P":
+                continue  # populated places only
+            if countries and columns[COUNTRY] not in countries:
+                continue
+            population = int(columns[POPULATION] or 0)
+            if population < min_population:
+                continue
+            names = {columns[NAME], columns[ASCII_NAME]}
+            if alternates:
+                names.update(name for name in columns[ALTERNATE_NAMES].split(",") if name)
+            places.append((
+                columns[NAME], float(columns[LAT]), float(columns[LON]),
+                columns[COUNTRY], population, names,
+            ))
+    return places
+
+def blob(strings):
+    """UTF-8 strings as one byte array plus an offsets array (n + 1)"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+def build(places, out_dir, cell_size_deg=CELL_SIZE_DEG):
+    columns = int(math.ceil(360 / cell_size_deg))
+
+    def cell(lat, lon):
+        row = int(math.floor((lat + 90) / cell_size_deg))
+        column = int(math.floor((lon + 180) / cell_size_deg)) % columns
+        return row * columns + column
+
+    # Sorted by cell so each cell is one contiguous slice
+    places = sorted(places, key=lambda p: cell(p[1], p[2]))
+    name_offsets, names = blob([p[0] for p in places])
+
+    # Every spelling of every place, sorted for binary search
+    keys = sorted({
+        (normalize_city(name), index)
+        for index, p in enumerate(places) for name in p[5]
+        if normalize_city(name)
+    })
+    key_offsets, key_bytes = blob([key for key, _ in keys])
+
+    arrays = {
+        "lat": np.array([p[1] for p in places], dtype=np.float32),
+        "lon": np.array([p[2] for p in places], dtype=np.float32),
+        "cell": np.array([cell(p[1], p[2]) for p in places], dtype=np.int64),
+        "population": np.array([p[4] for p in places], dtype=np.int64),
+        "country": np.array([p[3].encode("ascii", "ignore") for p in places], dtype="S2"),
+        "name_offsets": name_offsets,
+        "names": names,
+        "key_offsets": key_offsets,
+        "keys": key_bytes,
+        "key_place": np.array([index for _, index in keys], dtype=np.int32),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump({"cellSizeDeg": cell_size_deg, "places": len(places), "keys": len(keys)}, f)
+    return len(places), len(keys)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a GeoNames dump for /api/geo")
+    parser.add_argument("source", help="GeoNames dump (tab-separated .txt)")
+    parser.add_argument("out_dir", nargs="?", default=os.path.join("data", "gazetteer"))
+    parser.add_argument("--countries", default="", help="Comma-separated ISO codes to keep")
+    parser.add_argument("--min-population", type=int, default=0)
+    parser.add_argument("--no-alternates", action="store_true",
+                        help="Index only the main and ASCII names (smaller, but no 'Bombay')")
+    parser.add_argument("--cell-size", type=float, default=CELL_SIZE_DEG)
+    args = parser.parse_args()
+
+    countries = {code.strip().upper() for code in args.countries.split(",") if code.strip()}
+    start = time.perf_counter()
+    places = read_places(args.source, countries, args.min_population, not args.no_alternates)
+    count, keys = build(places, args.out_dir, args.cell_size)
+    print(f"✅ {count} places, {keys} names -> {args.out_dir} ({time.perf_counter() - start:.1f}s)")
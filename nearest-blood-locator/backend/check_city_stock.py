@@ -0,0 +1,30 @@
+# Consistency check: maintained city_stock totals vs. a recompute from blood_stock
+# Run with: python check_city_stock.py [--fix]
+
+import sys
+
+from app import app, db
+from models import City, CityStock
+
+with app.app_context():
+    drift = CityStock.drift()
+    if not drift:
+        print("✅ city_stock matches blood_stock")
+        sys.exit(0)
+
+    names = dict(db.session.execute(db.select(City.id, City.name)).all())
+    print(f"❌ {len(drift)} city/group totals have drifted:")
+    for city_id, group, stored, actual in drift:
+        print(f"   {names.get(city_id, city_id)} {group}: stored {stored}, actual {actual} ({actual - stored:+d})")
+
+    if "--fix" in sys.argv:
+        try:
+            rows = CityStock.rebuild()
+            db.session.commit()
+            print(f"✅ Rebuilt {rows} city/group totals")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+    else:
+        sys.exit(1)
@@ -1,63 +1,126 @@
+import datetime
 from flask import request, jsonify
 from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import false, func
+from sqlalchemy.exc import IntegrityError
 from extensions import db
-from models.blood_stock import BloodStock
 from models.blood_bank import BloodBank
+from models.blood_stock import BloodStock
+from models.stock_movement import StockMovement
+from models.stock_rollup import StockRollup
+from models.city import City
+from models.city_stock import CityStock
+from utils.cache import response_cache
+from utils.blood_groups import BLOOD_GROUPS, normalize_group
+from utils.events import event_broker
+from utils.bank_lookup import bank_lookup
+from utils.city_index import city_index
+from utils.conditional import Watermark
+from utils.serialization import json_response, parse_fields, use_fast_path
+
+def _publish_stock(bank, items, event_type):
+    for item in items:
+        payload = item.to_dict()
+        payload["bankName"] = bank.name
+        event_broker.publish(
+            event_type, payload, blood_group=item.blood_group, city=bank.city, city_id=bank.city_id
+        )
+
+def _locked_bank(user_id):
+    """
+    The caller's bank row, locked FOR UPDATE until the transaction ends
+
+    bank_lookup only says which bank the user owns. The row lock puts
+    this stock change in order with other stock changes of the bank and
+    with a city change or delete, and the city the movement is totalled
+    under is read from the locked row, never from the cached BankRef.
+    A cached id that no longer points at the user's bank (deleted or
+    replaced in another worker) is looked up again once.
+    """
+    for _ in range(2):
+        ref = bank_lookup.resolve(user_id)
+        if ref is None:
+            return None
+        bank = BloodBank.query.filter_by(id=ref.id).with_for_update().first()
+        if bank is not None and bank.created_by == user_id:
+            return bank
+        bank_lookup.invalidate(user_id)
+    return None
 
 def get_stock():
     user_id = int(get_jwt_identity())
-    bank = BloodBank.query.filter_by(created_by=user_id).first()
+    bank = bank_lookup.resolve(user_id)
     if not bank:
         return jsonify([]), 200 # No bank, empty stock
 
-    stock = BloodStock.query.filter_by(blood_bank_id=bank.id).all()
-    return jsonify([item.to_dict() for item in stock]), 200
+    fields = parse_fields(request.args)
+    try:
+        rows = BloodStock.list_rows.only(fields)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    query = BloodStock.query.filter_by(blood_bank_id=bank.id)
+    watermark = Watermark.of(query, BloodStock.last_updated, private=True)
+    if watermark.is_fresh():
+        return watermark.not_modified()
+
+    if fields or use_fast_path():
+        return watermark.apply(json_response(rows.serialize(query))), 200
+
+    stock = query.all()
+    return watermark.apply(jsonify([item.to_dict() for item in stock])), 200
 
 def add_stock_entry():
     user_id = int(get_jwt_identity())
-    bank = BloodBank.query.filter_by(created_by=user_id).first()
+    bank = _locked_bank(user_id)
     if not bank:
         return jsonify({"msg": "Please register your blood bank profile first"}), 403
 
-    data = request.get_json()
-    blood_group = data.get("bloodGroup", "").strip().upper()
+    data = request.get_json() or {}
+    blood_group = normalize_group(data.get("bloodGroup"))
     quantity = data.get("quantity", 0)
 
     if not blood_group:
-        return jsonify({"msg": "Blood group is required"}), 400
+        return jsonify({"msg": "A valid blood group is required"}), 400
     
     try:
         quantity = int(quantity)
     except (ValueError, TypeError):
         return jsonify({"msg": "Quantity must be a valid number"}), 400
 
-    # Check if already exists for THIS bank
-    existing = BloodStock.query.filter_by(blood_group=blood_group, blood_bank_id=bank.id).first()
-    if existing:
-        return jsonify({"msg": f"Stock entry for {blood_group} already exists. Please use 'Update Existing Stock' instead."}), 409
-
     if quantity < 0:
         return jsonify({"msg": "Quantity cannot be negative"}), 400
 
     new_entry = BloodStock(blood_group=blood_group, quantity=quantity, blood_bank_id=bank.id)
     
+    # No pre-read: uq_blood_stock_bank_group rejects a second entry for
+    # the same group, even when two requests race
     try:
         db.session.add(new_entry)
+        StockMovement.record(bank, [(blood_group, 0, quantity)], data.get("reason") or "initial")
         db.session.commit()
+        response_cache.invalidate("bloodbanks")
+        _publish_stock(bank, [new_entry], "stock.added")
         return jsonify({"msg": f"Added new blood group entry: {blood_group}", "entry": new_entry.to_dict()}), 201
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": f"Stock entry for {blood_group} already exists. Please use 'Update Existing Stock' instead."}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Failed to add entry", "error": str(e)}), 500
 
 def update_stock():
     user_id = int(get_jwt_identity())
-    bank = BloodBank.query.filter_by(created_by=user_id).first()
+    bank = _locked_bank(user_id)
     if not bank:
         return jsonify({"msg": "Blood bank not found"}), 403
 
-    data = request.get_json()
-    blood_group = data.get("bloodGroup", "").strip().upper()
+    data = request.get_json() or {}
+    blood_group = normalize_group(data.get("bloodGroup"))
     quantity = data.get("quantity")
+
+    if not blood_group:
+        return jsonify({"msg": "A valid blood group is required"}), 400
     
     if quantity is None:
         return jsonify({"msg": "Quantity is required"}), 400
@@ -70,16 +133,192 @@ def update_stock():
     if quantity < 0:
         return jsonify({"msg": "Quantity cannot be negative"}), 400
 
-    item = BloodStock.query.filter_by(blood_group=blood_group, blood_bank_id=bank.id).first()
+    # Locked so the logged delta (and the city total built from it) is
+    # measured against the value this request actually overwrites. (The
+    # bank row lock already serializes this bank's stock writers.)
+    item = BloodStock.query.filter_by(blood_group=blood_group, blood_bank_id=bank.id).with_for_update().first()
     
     if not item:
         return jsonify({"msg": "Blood group not found in stock. Use Add Entry first."}), 404
 
+    previous = item.quantity
     item.quantity = quantity
 
     try:
+        StockMovement.record(bank, [(blood_group, previous, quantity)], data.get("reason") or "adjustment")
         db.session.commit()
+        response_cache.invalidate("bloodbanks")
+        _publish_stock(bank, [item], "stock.updated")
         return jsonify({"msg": "Stock updated", "entry": item.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Update failed", "error": str(e)}), 500
+
+
+def adjust_stock():
+    """Receive (positive delta) or issue (negative delta) units of one group"""
+    user_id = int(get_jwt_identity())
+    bank = _locked_bank(user_id)
+    if not bank:
+        return jsonify({"msg": "Blood bank not found"}), 403
+
+    data = request.get_json() or {}
+    blood_group = normalize_group(data.get("bloodGroup"))
+    if not blood_group:
+        return jsonify({"msg": "A valid blood group is required"}), 400
+
+    try:
+        delta = int(data.get("delta"))
+    except (ValueError, TypeError):
+        return jsonify({"msg": "delta must be a whole number of units"}), 400
+    if delta == 0:
+        return jsonify({"msg": "delta cannot be zero"}), 400
+
+    try:
+        quantity = BloodStock.adjust_quantity(bank.id, blood_group, delta)
+        if quantity is None:
+            db.session.rollback()
+            return jsonify({"msg": f"Not enough {blood_group} units in stock"}), 409
+        StockMovement.record(
+            bank, [(blood_group, quantity - delta, quantity)],
+            data.get("reason") or ("received" if delta > 0 else "issued")
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Adjustment failed", "error": str(e)}), 500
+
+    response_cache.invalidate("bloodbanks")
+    item = BloodStock.query.filter_by(blood_bank_id=bank.id, blood_group=blood_group).first()
+    _publish_stock(bank, [item], "stock.updated")
+    return jsonify({"msg": "Stock adjusted", "entry": item.to_dict()}), 200
+
+def bulk_update_stock():
+    user_id = int(get_jwt_identity())
+    bank = _locked_bank(user_id)
+    if not bank:
+        return jsonify({"msg": "Blood bank not found"}), 403
+
+    data = request.get_json()
+    entries = (data or {}).get("stock")
+    if isinstance(entries, dict):
+        entries = [{"bloodGroup": group, "quantity": quantity} for group, quantity in entries.items()]
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"msg": "stock must be a non-empty list or mapping of blood group to quantity"}), 400
+
+    # Validate the whole vector before touching the database
+    quantities = {}
+    for entry in entries:
+        blood_group = normalize_group(entry.get("bloodGroup") if isinstance(entry, dict) else None)
+        if not blood_group:
+            return jsonify({"msg": f"Invalid blood group in entry: {entry}"}), 400
+        try:
+            quantity = int(entry.get("quantity"))
+        except (ValueError, TypeError):
+            return jsonify({"msg": f"Quantity for {blood_group} must be a valid number"}), 400
+        if quantity < 0:
+            return jsonify({"msg": f"Quantity for {blood_group} cannot be negative"}), 400
+        quantities[blood_group] = quantity
+
+    try:
+        # The bank row lock taken above keeps other writers out, including
+        # one inserting a group that has no row yet; the row locks keep
+        # the logged deltas equal to what we overwrite
+        current = {
+            item.blood_group: item.quantity
+            for item in BloodStock.query.filter_by(blood_bank_id=bank.id).with_for_update().all()
+        }
+        BloodStock.upsert_quantities(bank.id, quantities)
+        StockMovement.record(
+            bank,
+            [(group, current.get(group, 0), quantity) for group, quantity in quantities.items()],
+            data.get("reason") or "reconciliation"
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Bulk update failed", "error": str(e)}), 500
+
+    response_cache.invalidate("bloodbanks")
+    stock = BloodStock.query.filter_by(blood_bank_id=bank.id).all()
+    _publish_stock(bank, [item for item in stock if item.blood_group in quantities], "stock.updated")
+    return jsonify({
+        "msg": f"Updated {len(quantities)} blood groups",
+        "stock": [item.to_dict() for item in stock]
+    }), 200
+
+def get_city_availability():
+    """Units on hand in one city right now, from the maintained city totals"""
+    city = (request.args.get("city") or "").strip()
+    if not city:
+        return jsonify({"msg": "city is required"}), 400
+
+    blood_group = request.args.get("bloodGroup")
+    if blood_group:
+        blood_group = normalize_group(blood_group)
+        if not blood_group:
+            return jsonify({"msg": "Unknown blood group"}), 400
+
+    # Any spelling or alias of the city; an unknown city has no stock
+    city_id = city_index.find(city)
+    units = {}
+    if city_id is not None:
+        query = CityStock.query.filter_by(city_id=city_id)
+        if blood_group:
+            query = query.filter_by(blood_group=blood_group)
+        # At most eight rows, read through the (city_id, blood_group) unique key
+        units = {row.blood_group: row.units for row in query.all()}
+
+    groups = [blood_group] if blood_group else BLOOD_GROUPS
+    return jsonify({
+        "city": city_index.name_of(city_id) if city_id is not None else city,
+        "cityId": city_id,
+        "units": {group: units.get(group, 0) for group in groups}
+    }), 200
+
+def get_stock_trends():
+    """Per-city, per-group movement totals over a recent window, from rollups"""
+    try:
+        hours = min(max(int(request.args.get("hours", 24)), 1), 24 * 90)
+    except ValueError:
+        return jsonify({"msg": "hours must be a number"}), 400
+
+    now = datetime.datetime.utcnow()
+    since = StockRollup.bucket_for(now - datetime.timedelta(hours=hours - 1))
+
+    query = db.session.query(
+        StockRollup.city_id,
+        City.name,
+        StockRollup.blood_group,
+        func.sum(StockRollup.units_in),
+        func.sum(StockRollup.units_out),
+        func.sum(StockRollup.movements),
+    ).join(City, City.id == StockRollup.city_id).filter(StockRollup.bucket_start >= since)
+
+    city = (request.args.get("city") or "").strip()
+    blood_group = (request.args.get("bloodGroup") or "").strip().upper()
+    if city:
+        # Any spelling or alias of the city; unknown names match nothing
+        city_id = city_index.find(city)
+        query = query.filter(StockRollup.city_id == city_id if city_id is not None else false())
+    if blood_group:
+        query = query.filter(StockRollup.blood_group == blood_group)
+
+    rows = query.group_by(StockRollup.city_id, City.name, StockRollup.blood_group).all()
+    return jsonify({
+        "since": since.isoformat(),
+        "hours": hours,
+        "totals": [
+            {
+                "city": city_name,
+                "cityId": city_id,
+                "bloodGroup": group,
+                "unitsIn": int(units_in or 0),
+                "unitsOut": int(units_out or 0),
+                "netChange": int((units_in or 0) - (units_out or 0)),
+                "movements": int(movements or 0),
+                "unitsOutPerHour": round((units_out or 0) / hours, 2),
+            }
+            for city_id, city_name, group, units_in, units_out, movements in rows
+        ]
+    }), 200
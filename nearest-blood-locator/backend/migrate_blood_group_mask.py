@@ -0,0 +1,32 @@
+from app import app, db
+from sqlalchemy import text
+from utils.blood_groups import groups_to_mask
+
+BATCH_SIZE = 1000
+
+with app.app_context():
+    print("Adding 'blood_group_mask' column to 'blood_banks' table...")
+    with db.engine.connect() as conn:
+        try:
+            conn.execute(text(
+                "ALTER TABLE blood_banks ADD COLUMN blood_group_mask SMALLINT NOT NULL DEFAULT 0"
+            ))
+            conn.commit()
+            print("✅ Column added.")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error (column might already exist): {e}")
+
+        print("Backfilling masks from 'available_blood_groups'...")
+        rows = conn.execute(text("SELECT id, available_blood_groups FROM blood_banks")).fetchall()
+        updates = [
+            {"id": row_id, "mask": groups_to_mask(groups or "")}
+            for row_id, groups in rows
+        ]
+        for start in range(0, len(updates), BATCH_SIZE):
+            conn.execute(
+                text("UPDATE blood_banks SET blood_group_mask = :mask WHERE id = :id"),
+                updates[start:start + BATCH_SIZE]
+            )
+        conn.commit()
+        print(f"✅ Backfilled {len(updates)} blood banks.")
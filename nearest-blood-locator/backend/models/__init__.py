@@ -1,5 +1,10 @@
 from .user import User
+from .city import City, CityAlias
 from .donor import Donor
 from .recipient import Recipient
 from .blood_bank import BloodBank
 from .blood_stock import BloodStock
+from .stock_rollup import StockRollup
+from .city_stock import CityStock
+from .stock_movement import StockMovement
+from .tombstone import Tombstone
@@ -1,13 +1,22 @@
 import datetime
 from extensions import db
+from utils.sql_helpers import precise_datetime
+from utils.blood_groups import MASK_GROUPS, groups_to_mask, mask_to_groups
+from utils.serialization import RowSerializer
 
 class BloodBank(db.Model):
     __tablename__ = 'blood_banks'
+    __table_args__ = (
+        db.Index('ix_blood_banks_lat_lng', 'latitude', 'longitude'),
+        db.Index('ix_blood_banks_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(255), nullable=True)
     city = db.Column(db.String(100), nullable=False, index=True)
+    # Normalized city (see models.city); what city searches filter on
+    city_id = db.Column(db.Integer, db.ForeignKey('cities.id'), nullable=True, index=True)
     
     # ✅ Added location fields
     latitude = db.Column(db.Float, nullable=True)
@@ -15,18 +24,31 @@ class BloodBank(db.Model):
     
     contact_number = db.Column(db.String(20), nullable=False)
     available_blood_groups = db.Column(db.String(255), default="")
+    # One bit per group (see utils.blood_groups); filter with a bitwise AND
+    # instead of LIKE on the comma-joined string above
+    blood_group_mask = db.Column(db.SmallInteger, nullable=False, default=0)
     stock_status = db.Column(db.String(50), default="Available")
     
     # Foreign Key to User
-    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, 
+        precise_datetime(),
         default=datetime.datetime.utcnow,
         onupdate=datetime.datetime.utcnow
     )
 
+    def set_blood_groups(self, groups):
+        """Store groups as a mask, keeping the legacy string column in sync"""
+        self.blood_group_mask = groups_to_mask(groups)
+        self.available_blood_groups = ",".join(mask_to_groups(self.blood_group_mask))
+
+    @classmethod
+    def has_blood_group(cls, group_bit):
+        """SQL predicate: bank lists the group for this bit"""
+        return cls.blood_group_mask.op("&")(group_bit) != 0
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -36,11 +58,29 @@ class BloodBank(db.Model):
             "latitude": self.latitude,  # ✅ Added
             "longitude": self.longitude,  # ✅ Added
             "contactNumber": self.contact_number,
-            "availableBloodGroups": self.available_blood_groups.split(",") if self.available_blood_groups else [],
+            "availableBloodGroups": mask_to_groups(self.blood_group_mask),
             "stockStatus": self.stock_status,
             "createdBy": self.created_by,
             "createdAt": self.created_at.isoformat() if self.created_at else None
         }
 
     def __repr__(self):
-        return f"<BloodBank {self.name}>"
\ No newline at end of file
+        return f"<BloodBank {self.name}>"
+
+def _groups_for_mask(mask):
+    return MASK_GROUPS[mask or 0]
+
+# Same shape as to_dict(), read from column tuples (see utils.serialization)
+BloodBank.list_rows = RowSerializer([
+    ("id", BloodBank.id),
+    ("name", BloodBank.name),
+    ("address", BloodBank.address),
+    ("city", BloodBank.city),
+    ("latitude", BloodBank.latitude),
+    ("longitude", BloodBank.longitude),
+    ("contactNumber", BloodBank.contact_number),
+    ("availableBloodGroups", BloodBank.blood_group_mask, _groups_for_mask),
+    ("stockStatus", BloodBank.stock_status),
+    ("createdBy", BloodBank.created_by),
+    ("createdAt", BloodBank.created_at),
+])
\ No newline at end of file
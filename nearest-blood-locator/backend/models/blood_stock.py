@@ -1,20 +1,97 @@
 from extensions import db
+from utils.sql_helpers import precise_datetime, upsert
+from utils.serialization import RowSerializer
 import datetime
 
 class BloodStock(db.Model):
     # __bind_key__ = 'blood_bank'
     __tablename__ = 'blood_stock'
+    __table_args__ = (
+        db.Index('ix_blood_stock_group_qty', 'blood_group', 'quantity'),
+        db.Index('ix_blood_stock_last_updated', 'last_updated'),
+        # One row per group per bank; also the conflict target for upserts
+        db.UniqueConstraint('blood_bank_id', 'blood_group', name='uq_blood_stock_bank_group'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     blood_group = db.Column(db.String(5), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
     blood_bank_id = db.Column(db.Integer, nullable=True) # ID from blood_banks table in primary DB
     last_updated = db.Column(
-        db.DateTime, 
+        precise_datetime(),
         default=datetime.datetime.utcnow, 
         onupdate=datetime.datetime.utcnow
     )
 
+    @classmethod
+    def upsert_quantities(cls, bank_id, quantities):
+        """
+        Set absolute quantities for several groups in one statement
+
+        Args:
+            bank_id: Blood bank the rows belong to
+            quantities: Dict of blood group -> quantity
+
+        Runs inside the caller's transaction; the caller commits.
+        """
+        if not quantities:
+            return
+        now = datetime.datetime.utcnow()
+        rows = [
+            {"blood_bank_id": bank_id, "blood_group": group, "quantity": quantity, "last_updated": now}
+            for group, quantity in quantities.items()
+        ]
+        stmt = upsert(
+            cls, rows, ["blood_bank_id", "blood_group"],
+            lambda new: {"quantity": new.quantity, "last_updated": new.last_updated}
+        )
+        db.session.execute(stmt)
+
+    @classmethod
+    def adjust_quantity(cls, bank_id, blood_group, delta):
+        """
+        Add delta units to one group in a single atomic statement
+
+        Receiving (delta >= 0) is an upsert that creates the row if
+        needed; issuing (delta < 0) is a guarded UPDATE that only applies
+        when enough units are on hand. The arithmetic happens in SQL
+        (quantity = quantity + :delta), so concurrent calls never lose
+        each other's changes.
+
+        Args:
+            bank_id: Blood bank the row belongs to
+            blood_group: Canonical blood group
+            delta: Units received (positive) or issued (negative)
+
+        Returns:
+            Quantity after the change, or None if issuing would take the
+            quantity below zero (or there is no stock row to issue from)
+
+        Runs inside the caller's transaction; the caller commits.
+        """
+        now = datetime.datetime.utcnow()
+        if delta >= 0:
+            db.session.execute(upsert(
+                cls,
+                [{"blood_bank_id": bank_id, "blood_group": blood_group, "quantity": delta, "last_updated": now}],
+                ["blood_bank_id", "blood_group"],
+                lambda new: {"quantity": cls.quantity + new.quantity, "last_updated": new.last_updated}
+            ))
+        else:
+            result = db.session.execute(
+                db.update(cls)
+                .where(cls.blood_bank_id == bank_id, cls.blood_group == blood_group)
+                .where(cls.quantity + delta >= 0)
+                .values(quantity=cls.quantity + delta, last_updated=now)
+            )
+            if result.rowcount == 0:
+                return None
+        # The row is now locked by this transaction, so this read sees
+        # exactly the value the statement above produced
+        return db.session.execute(
+            db.select(cls.quantity).where(cls.blood_bank_id == bank_id, cls.blood_group == blood_group)
+        ).scalar_one()
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -23,3 +100,12 @@ class BloodStock(db.Model):
             "quantity": self.quantity,
             "lastUpdated": self.last_updated.isoformat() if self.last_updated else None
         }
+
+# Same shape as to_dict(), read from column tuples (see utils.serialization)
+BloodStock.list_rows = RowSerializer([
+    ("id", BloodStock.id),
+    ("bloodBankId", BloodStock.blood_bank_id),
+    ("bloodGroup", BloodStock.blood_group),
+    ("quantity", BloodStock.quantity),
+    ("lastUpdated", BloodStock.last_updated),
+])
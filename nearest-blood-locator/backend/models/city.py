@@ -0,0 +1,43 @@
+import datetime
+import string
+from extensions import db
+
+def normalize_city(name):
+    """Lookup key for a city name: lower case, dots dropped, spaces collapsed"""
+    return " ".join((name or "").replace(".", " ").lower().split())
+
+def display_city(name):
+    """Canonical spelling stored for a city first seen as free text"""
+    return string.capwords(normalize_city(name))
+
+class City(db.Model):
+    """
+    One row per city; donors, recipients and banks point at it by city_id
+
+    The free-text city columns stay as entered for display, but filters
+    are equality lookups on the integer key. Cities are created on first
+    use and never deleted.
+    """
+    __tablename__ = "cities"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(100), nullable=False)
+    name_key = db.Column(db.String(100), nullable=False, unique=True)  # normalize_city(name)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name}
+
+    def __repr__(self):
+        return f"<City {self.name}>"
+
+class CityAlias(db.Model):
+    """Another spelling or former name of a city ("bombay" -> Mumbai)"""
+    __tablename__ = "city_aliases"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    alias_key = db.Column(db.String(100), nullable=False, unique=True)  # normalize_city(alias)
+    city_id = db.Column(db.Integer, db.ForeignKey("cities.id"), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CityAlias {self.alias_key} -> {self.city_id}>"
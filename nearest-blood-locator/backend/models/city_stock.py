@@ -0,0 +1,128 @@
+import datetime
+from sqlalchemy import func
+from extensions import db
+from models.blood_bank import BloodBank
+from models.blood_stock import BloodStock
+from utils.sql_helpers import upsert
+
+class CityStock(db.Model):
+    """Units currently on hand per city and blood group, across all banks"""
+    __tablename__ = "city_stock"
+    __table_args__ = (
+        # Also the lookup key for GET /api/blood-stock/availability
+        db.UniqueConstraint("city_id", "blood_group", name="uq_city_stock_city_id_group"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Normalized city (see models.city), so spellings and aliases of one
+    # city share a total
+    city_id = db.Column(db.Integer, db.ForeignKey("cities.id"), nullable=False)
+    blood_group = db.Column(db.String(5), nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.datetime.utcnow,
+        onupdate=datetime.datetime.utcnow
+    )
+
+    @classmethod
+    def apply(cls, city_id, deltas):
+        """
+        Add per-group unit deltas to a city's totals in one statement
+
+        Args:
+            city_id: city_id of the bank whose stock changed; banks
+                without one (blank city) are not totalled
+            deltas: List of (blood_group, delta)
+
+        Runs inside the caller's transaction, next to the stock write.
+        """
+        if city_id is None:
+            return
+        totals = {}
+        for group, delta in deltas:
+            totals[group] = totals.get(group, 0) + delta
+        now = datetime.datetime.utcnow()
+        rows = [
+            {"city_id": city_id, "blood_group": group, "units": delta, "updated_at": now}
+            for group, delta in totals.items()
+            if delta
+        ]
+        if not rows:
+            return
+        db.session.execute(upsert(
+            cls, rows, ["city_id", "blood_group"],
+            lambda new: {"units": cls.units + new.units, "updated_at": new.updated_at}
+        ))
+
+    @classmethod
+    def move_bank(cls, bank_id, from_city_id, to_city_id):
+        """
+        Shift a bank's whole stock between city totals
+
+        Call when a bank changes city (to_city_id set) or is deleted
+        (to_city_id None), inside the same transaction, with the bank row
+        already locked FOR UPDATE so no stock writer can run in between.
+        """
+        if from_city_id == to_city_id:
+            return
+        # A locking read: it sees the latest committed quantities even
+        # when the transaction's snapshot is older than the bank lock
+        stock = db.session.execute(
+            db.select(BloodStock.blood_group, BloodStock.quantity)
+            .where(BloodStock.blood_bank_id == bank_id)
+            .with_for_update()
+        ).all()
+        cls.apply(from_city_id, [(group, -quantity) for group, quantity in stock])
+        cls.apply(to_city_id, [(group, quantity) for group, quantity in stock])
+
+    @classmethod
+    def recompute(cls):
+        """Totals rebuilt from blood_stock joined to its banks: {(city_id, group): units}"""
+        rows = db.session.execute(
+            db.select(BloodBank.city_id, BloodStock.blood_group, func.sum(BloodStock.quantity))
+            .join(BloodBank, BloodBank.id == BloodStock.blood_bank_id)
+            .where(BloodBank.city_id.isnot(None))
+            .group_by(BloodBank.city_id, BloodStock.blood_group)
+        ).all()
+        return {(city_id, group): int(units or 0) for city_id, group, units in rows}
+
+    @classmethod
+    def drift(cls):
+        """
+        Compare the maintained totals with a fresh recompute
+
+        Returns:
+            List of (city_id, blood_group, stored_units, actual_units) that differ
+        """
+        actual = cls.recompute()
+        stored = {(row.city_id, row.blood_group): row.units for row in cls.query.all()}
+        return sorted(
+            (city_id, group, stored.get((city_id, group), 0), actual.get((city_id, group), 0))
+            for city_id, group in set(actual) | set(stored)
+            if stored.get((city_id, group), 0) != actual.get((city_id, group), 0)
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """Replace every total with a fresh recompute; the caller commits"""
+        now = datetime.datetime.utcnow()
+        rows = [
+            {"city_id": city_id, "blood_group": group, "units": units, "updated_at": now}
+            for (city_id, group), units in cls.recompute().items()
+        ]
+        db.session.execute(db.delete(cls))
+        if rows:
+            db.session.execute(db.insert(cls), rows)
+        return len(rows)
+
+    def to_dict(self):
+        return {
+            "cityId": self.city_id,
+            "bloodGroup": self.blood_group,
+            "units": self.units,
+            "updatedAt": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f"<CityStock {self.city_id} {self.blood_group}: {self.units}>"
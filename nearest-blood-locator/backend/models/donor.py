@@ -1,8 +1,15 @@
 import datetime
 from extensions import db
+from utils.sql_helpers import precise_datetime
+from utils.serialization import RowSerializer
 
 class Donor(db.Model):
     __tablename__ = "donors"
+    __table_args__ = (
+        db.Index("ix_donors_lat_lng", "latitude", "longitude"),
+        db.Index("ix_donors_group_available", "blood_group", "availability_status"),
+        db.Index("ix_donors_updated_at", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
@@ -12,6 +19,8 @@ class Donor(db.Model):
     age = db.Column(db.Integer, nullable=True)
     phone = db.Column(db.String(20), nullable=False)
     city = db.Column(db.String(100), nullable=False)
+    # Normalized city (see models.city); what location searches filter on
+    city_id = db.Column(db.Integer, db.ForeignKey("cities.id"), nullable=True, index=True)
     
     # ✅ Added location fields
     latitude = db.Column(db.Float, nullable=True)
@@ -22,7 +31,7 @@ class Donor(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, 
+        precise_datetime(),
         default=datetime.datetime.utcnow,
         onupdate=datetime.datetime.utcnow
     )
@@ -44,4 +53,23 @@ class Donor(db.Model):
         }
 
     def __repr__(self):
-        return f"<Donor {self.name} ({self.blood_group})>"
\ No newline at end of file
+        return f"<Donor {self.name} ({self.blood_group})>"
+
+def _availability_label(available):
+    return "Available" if available else "Unavailable"
+
+# Same shape as to_dict(), read from column tuples (see utils.serialization)
+Donor.list_rows = RowSerializer([
+    ("id", Donor.id),
+    ("userId", Donor.user_id),
+    ("name", Donor.name),
+    ("fullName", Donor.name),
+    ("bloodGroup", Donor.blood_group),
+    ("age", Donor.age),
+    ("phoneNumber", Donor.phone),
+    ("location", Donor.city),
+    ("latitude", Donor.latitude),
+    ("longitude", Donor.longitude),
+    ("availabilityStatus", Donor.availability_status, _availability_label),
+    ("createdAt", Donor.created_at),
+])
\ No newline at end of file
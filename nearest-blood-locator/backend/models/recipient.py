@@ -1,8 +1,20 @@
 import datetime
 from extensions import db
+from utils.sql_helpers import precise_datetime
+from utils.serialization import RowSerializer
 
 class Recipient(db.Model):
     __tablename__ = "recipients"
+    __table_args__ = (
+        # Keyset pagination (created_at DESC, id DESC), optionally narrowed
+        # by one equality filter
+        db.Index("ix_recipients_created_id", "created_at", "id"),
+        db.Index("ix_recipients_group_created_id", "required_blood_group", "created_at", "id"),
+        db.Index("ix_recipients_city_id_created_id", "city_id", "created_at", "id"),
+        db.Index("ix_recipients_urgency_created_id", "urgency_level", "created_at", "id"),
+        # max(updated_at) watermark for conditional GETs
+        db.Index("ix_recipients_updated_at", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
@@ -11,6 +23,8 @@ class Recipient(db.Model):
     required_blood_group = db.Column(db.String(5), nullable=False)
     phone = db.Column(db.String(20), nullable=False)
     city = db.Column(db.String(100), nullable=False)
+    # Normalized city (see models.city); what the city filter compares
+    city_id = db.Column(db.Integer, db.ForeignKey("cities.id"), nullable=True)
     
     # ✅ Location fields
     latitude = db.Column(db.Float, nullable=True)
@@ -20,7 +34,7 @@ class Recipient(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     updated_at = db.Column(
-        db.DateTime, 
+        precise_datetime(),
         default=datetime.datetime.utcnow,
         onupdate=datetime.datetime.utcnow
     )
@@ -40,4 +54,18 @@ class Recipient(db.Model):
         }
 
     def __repr__(self):
-        return f"<Recipient {self.name} ({self.required_blood_group})>"
\ No newline at end of file
+        return f"<Recipient {self.name} ({self.required_blood_group})>"
+
+# Same shape as to_dict(), read from column tuples (see utils.serialization)
+Recipient.list_rows = RowSerializer([
+    ("id", Recipient.id),
+    ("userId", Recipient.user_id),
+    ("name", Recipient.name),
+    ("requiredBloodGroup", Recipient.required_blood_group),
+    ("phone", Recipient.phone),
+    ("city", Recipient.city),
+    ("latitude", Recipient.latitude),
+    ("longitude", Recipient.longitude),
+    ("urgencyLevel", Recipient.urgency_level),
+    ("createdAt", Recipient.created_at),
+], hidden=(Recipient.created_at, Recipient.id))  # keyset_page reads these from the last row
\ No newline at end of file
@@ -0,0 +1,68 @@
+import datetime
+from extensions import db
+from models.stock_rollup import StockRollup
+from models.city_stock import CityStock
+
+class StockMovement(db.Model):
+    """Append-only log of stock changes; never updated or deleted"""
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        db.Index("ix_stock_movements_bank_group_created", "blood_bank_id", "blood_group", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    blood_bank_id = db.Column(db.Integer, nullable=False)
+    blood_group = db.Column(db.String(5), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    quantity_after = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False, default="adjustment")
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    @classmethod
+    def record(cls, bank, changes, reason):
+        """
+        Log stock changes and fold them into the hourly rollups and the
+        per-city current totals
+
+        Args:
+            bank: BloodBank whose stock changed, locked FOR UPDATE by the
+                caller so its city is current for the whole transaction
+            changes: List of (blood_group, old_quantity, new_quantity)
+            reason: Short free-text reason ("issue", "donation", ...)
+
+        Runs inside the caller's transaction; the caller commits, so the
+        log, the current-stock row and the rollup change together.
+        """
+        now = datetime.datetime.utcnow()
+        rows = [
+            {
+                "blood_bank_id": bank.id,
+                "blood_group": group,
+                "delta": new - old,
+                "quantity_after": new,
+                "reason": (reason or "adjustment")[:50],
+                "created_at": now,
+            }
+            for group, old, new in changes
+            if new != old
+        ]
+        if not rows:
+            return
+        db.session.execute(db.insert(cls), rows)
+        deltas = [(row["blood_group"], row["delta"]) for row in rows]
+        StockRollup.apply(bank.city_id, now, deltas)
+        CityStock.apply(bank.city_id, deltas)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "bloodBankId": self.blood_bank_id,
+            "bloodGroup": self.blood_group,
+            "delta": self.delta,
+            "quantityAfter": self.quantity_after,
+            "reason": self.reason,
+            "createdAt": self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f"<StockMovement {self.blood_group} {self.delta:+d}>"
@@ -0,0 +1,70 @@
+import datetime
+from extensions import db
+from utils.sql_helpers import upsert
+
+class StockRollup(db.Model):
+    """Hourly per-city, per-group totals of stock movements"""
+    __tablename__ = "stock_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("city_id", "blood_group", "bucket_start", name="uq_stock_rollups_city_id_group_bucket"),
+        db.Index("ix_stock_rollups_group_bucket", "blood_group", "bucket_start"),
+        db.Index("ix_stock_rollups_bucket", "bucket_start"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Normalized city (see models.city), as for city_stock
+    city_id = db.Column(db.Integer, db.ForeignKey("cities.id"), nullable=False)
+    blood_group = db.Column(db.String(5), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    units_in = db.Column(db.Integer, nullable=False, default=0)
+    units_out = db.Column(db.Integer, nullable=False, default=0)
+    movements = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def bucket_for(moment):
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def apply(cls, city_id, moment, deltas):
+        """
+        Add deltas to the current hour's rollup rows in one statement
+
+        Args:
+            city_id: city_id of the bank the movements belong to; banks
+                without one (blank city) are not rolled up
+            moment: Timestamp of the movements
+            deltas: List of (blood_group, delta)
+        """
+        if city_id is None:
+            return
+        bucket = cls.bucket_for(moment)
+        totals = {}
+        for group, delta in deltas:
+            units_in, units_out, count = totals.get(group, (0, 0, 0))
+            totals[group] = (
+                units_in + max(delta, 0),
+                units_out + max(-delta, 0),
+                count + 1,
+            )
+        rows = [
+            {
+                "city_id": city_id,
+                "blood_group": group,
+                "bucket_start": bucket,
+                "units_in": units_in,
+                "units_out": units_out,
+                "movements": count,
+            }
+            for group, (units_in, units_out, count) in totals.items()
+        ]
+        db.session.execute(upsert(
+            cls, rows, ["city_id", "blood_group", "bucket_start"],
+            lambda new: {
+                "units_in": cls.units_in + new.units_in,
+                "units_out": cls.units_out + new.units_out,
+                "movements": cls.movements + new.movements,
+            }
+        ))
+
+    def __repr__(self):
+        return f"<StockRollup {self.city_id} {self.blood_group} {self.bucket_start}>"
@@ -0,0 +1,29 @@
+import datetime
+from extensions import db
+
+class Tombstone(db.Model):
+    """Marker left behind by a hard delete so delta sync can report it"""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        db.Index("ix_tombstones_deleted_at", "deleted_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(20), nullable=False)  # "bloodBank", "bloodStock", "recipient"
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    @classmethod
+    def record(cls, entity, entity_id):
+        """Add a tombstone to the caller's transaction; the caller commits"""
+        db.session.add(cls(entity=entity, entity_id=entity_id))
+
+    def to_dict(self):
+        return {
+            "type": self.entity,
+            "id": self.entity_id,
+            "deletedAt": self.deleted_at.isoformat() if self.deleted_at else None
+        }
+
+    def __repr__(self):
+        return f"<Tombstone {self.entity} {self.entity_id}>"
@@ -1,5 +1,19 @@
 import datetime
+import re
+from flask import current_app
 from extensions import db, bcrypt
+from utils.password_hashing import password_pool, hash_cost
+
+# Unique keys on users -> the field reported to the client. MySQL names
+# the key ("Duplicate entry ... for key 'users.ix_users_email'"; tables
+# created before the ORM use the bare column name), SQLite the column
+# ("UNIQUE constraint failed: users.email").
+DUPLICATE_KEYS = {
+    "ix_users_email": "email", "users.email": "email", "email": "email",
+    "ix_users_username": "username", "users.username": "username", "username": "username",
+}
+_MYSQL_DUPLICATE = re.compile(r"duplicate entry .* for key '(?:users\.)?([^']+)'", re.IGNORECASE | re.DOTALL)
+_SQLITE_DUPLICATE = re.compile(r"unique constraint failed: (\S+)", re.IGNORECASE)
 
 class User(db.Model):
     __tablename__ = "users"
@@ -24,12 +38,51 @@ class User(db.Model):
     blood_banks = db.relationship('BloodBank', backref='owner', lazy=True)
 
     def set_password(self, password):
-        """Hash and set the password"""
-        self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+        """Hash and set the password (runs on the bounded hashing pool)"""
+        self.password_hash = password_pool.run(bcrypt.generate_password_hash, password).decode("utf-8")
 
     def check_password(self, password):
-        """Verify the password"""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """Verify the password (runs on the bounded hashing pool)"""
+        return password_pool.run(bcrypt.check_password_hash, self.password_hash, password)
+
+    @classmethod
+    def find_by_identifier(cls, identifier):
+        """
+        Look a user up by email or username using a single unique index
+
+        Identifiers containing "@" are treated as emails; everything else
+        as a username. Usernames cannot contain "@" (enforced at
+        registration), so the username fallback only runs for accounts
+        created before that rule.
+        """
+        if "@" not in identifier:
+            return cls.query.filter(cls.username == identifier).first()
+        user = cls.query.filter(cls.email == identifier).first()
+        if user is None:
+            user = cls.query.filter(cls.username == identifier).first()
+        return user
+
+    @staticmethod
+    def duplicate_field(error):
+        """
+        Which unique column of users an IntegrityError on insert tripped
+
+        Matches the key or column name the database reports, never the
+        rejected value, which may itself contain "email".
+
+        Returns:
+            "email", "username", or None for any other failure (another
+            table's key, NOT NULL, foreign key, ...)
+        """
+        message = str(getattr(error, "orig", error))
+        match = _MYSQL_DUPLICATE.search(message) or _SQLITE_DUPLICATE.search(message)
+        if match is None:
+            return None
+        return DUPLICATE_KEYS.get(match.group(1).lower())
+
+    def needs_rehash(self):
+        """True when the stored hash was made with a different cost factor"""
+        return hash_cost(self.password_hash) != current_app.config.get("BCRYPT_LOG_ROUNDS", 12)
 
     def to_dict(self):
         return {
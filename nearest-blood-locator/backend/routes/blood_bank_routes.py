@@ -1,7 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import false
 from extensions import db
-from models import BloodBank
+from models import BloodBank, BloodStock, CityStock, Tombstone
+from utils.spatial_index import blood_bank_index, nearest_matching
+from utils.location_helper import parse_nearby_args, parse_point, parse_radius_args, radius_search
+from utils.blood_groups import GROUP_BITS, normalize_group
+from utils.cache import response_cache
+from utils.bank_lookup import bank_lookup
+from utils.city_index import city_index
+from utils.conditional import Watermark
+from utils.serialization import json_response, ndjson_response, parse_fields, use_fast_path, wants_ndjson
 
 blood_bank_bp = Blueprint('blood_bank_bp', __name__)
 
@@ -25,21 +34,42 @@ def create_blood_bank():
         return jsonify({"msg": "Name, city, and contact number are required"}), 400
 
     groups = data.get("availableBloodGroups") or []
-    groups_str = ",".join(groups) if isinstance(groups, list) else str(groups)
 
-    # Check if a bank already exists for this user
-    existing_bank = BloodBank.query.filter_by(created_by=user_id).first()
+    city_id = city_index.resolve(city)
+
+    # Check if a bank already exists for this user. Locked: a city change
+    # moves the bank's units between city totals, and stock writers take
+    # the same row lock before recording their own deltas.
+    existing_bank = BloodBank.query.filter_by(created_by=user_id).with_for_update().first()
+
+    # Validated before anything is written: the spatial index update runs
+    # after the commit and cannot take a bad point
+    try:
+        latitude, longitude = parse_point(
+            data.get("latitude", existing_bank.latitude if existing_bank else None),
+            data.get("longitude", existing_bank.longitude if existing_bank else None)
+        )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 400
     
     if existing_bank:
-        # Update existing
+        # Update existing; a city change carries the bank's units along
+        CityStock.move_bank(existing_bank.id, existing_bank.city_id, city_id)
         existing_bank.name = name
         existing_bank.city = city
+        existing_bank.city_id = city_id
         existing_bank.address = data.get("address")
         existing_bank.contact_number = contact_number
-        existing_bank.available_blood_groups = groups_str
+        existing_bank.set_blood_groups(groups)
+        existing_bank.latitude = latitude
+        existing_bank.longitude = longitude
         
         try:
             db.session.commit()
+            bank_lookup.invalidate(user_id)
+            blood_bank_index.upsert(existing_bank.id, existing_bank.latitude, existing_bank.longitude)
+            response_cache.invalidate("bloodbanks")
             return jsonify({"msg": "Blood Bank profile updated", "bloodBank": existing_bank.to_dict()}), 200
         except Exception as e:
             db.session.rollback()
@@ -49,35 +79,113 @@ def create_blood_bank():
         new_bank = BloodBank(
             name=name,
             city=city,
+            city_id=city_id,
             address=data.get("address"),
             contact_number=contact_number,
-            available_blood_groups=groups_str,
-            created_by=user_id
+            created_by=user_id,
+            latitude=latitude,
+            longitude=longitude
         )
+        new_bank.set_blood_groups(groups)
 
         try:
             db.session.add(new_bank)
             db.session.commit()
+            bank_lookup.invalidate(user_id)
+            blood_bank_index.upsert(new_bank.id, new_bank.latitude, new_bank.longitude)
+            response_cache.invalidate("bloodbanks")
             return jsonify({"msg": "Blood Bank created", "bloodBank": new_bank.to_dict()}), 201
         except Exception as e:
             db.session.rollback()
             return jsonify({"msg": "Creation failed", "error": str(e)}), 500
 
 @blood_bank_bp.route('/', methods=["GET"])
+@response_cache.cached("bloodbanks", bypass=wants_ndjson)
 def get_blood_banks():
     city = (request.args.get("city") or request.args.get("location") or "").strip().lower()
     blood_group = request.args.get("bloodGroup", "").strip().upper()
+    if blood_group and not normalize_group(blood_group):
+        return jsonify({"msg": "Unknown blood group"}), 400
+
+    try:
+        radius = parse_radius_args(request.args)
+        # fields= becomes the SELECT list; the radius filter still needs
+        # coordinates even when they are not returned
+        fields = parse_fields(request.args)
+        rows = BloodBank.list_rows.only(fields, hidden=(BloodBank.latitude, BloodBank.longitude) if radius else ())
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
 
     query = BloodBank.query
 
     if city:
-        query = query.filter(BloodBank.city.ilike(f"%{city}%"))
+        # The term names one city, or is a prefix of a few; either way an
+        # indexed integer match instead of a scan with LIKE '%term%'
+        city_ids = city_index.search_ids(city)
+        query = query.filter(BloodBank.city_id.in_(city_ids) if city_ids else false())
     
     if blood_group:
-        query = query.filter(BloodBank.available_blood_groups.ilike(f"%{blood_group}%"))
+        query = query.filter(BloodBank.has_blood_group(GROUP_BITS[blood_group]))
+
+    # One aggregate query decides whether the client's copy is current
+    watermark = Watermark.of(query, BloodBank.updated_at)
+    if watermark.is_fresh():
+        return watermark.not_modified()
+    return watermark.apply(_blood_bank_list(query, rows, fields, radius)), 200
+
+def _blood_bank_list(query, rows, fields, radius):
+    """Response body in the representation the client asked for"""
+    # Exports: rows go out as they are read. Radius results are sorted by
+    # distance, so they always need the full set first.
+    if not radius and wants_ndjson():
+        batch_size = current_app.config.get("STREAM_BATCH_SIZE", 500)
+        return ndjson_response(rows.stream(query, batch_size))
+
+    if fields or use_fast_path():
+        if radius:
+            matches = radius_search(rows.select(query), BloodBank, *radius)
+            results = rows.to_dicts([row for row, _ in matches])
+            for item, (_, distance) in zip(results, matches):
+                item["distanceKm"] = round(distance, 2)
+            return json_response(results)
+        return json_response(rows.serialize(query))
+
+    if radius:
+        results = []
+        for bank, distance in radius_search(query, BloodBank, *radius):
+            item = bank.to_dict()
+            item["distanceKm"] = round(distance, 2)
+            results.append(item)
+        return jsonify(results)
 
     banks = query.all()
-    return jsonify([b.to_dict() for b in banks]), 200
+    return jsonify([b.to_dict() for b in banks])
+
+@blood_bank_bp.route('/nearby', methods=["GET"])
+@response_cache.cached("bloodbanks")
+def get_nearby_blood_banks():
+    try:
+        lat, lng, k, radius_km = parse_nearby_args(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    blood_group = request.args.get("bloodGroup", "").strip().upper()
+    if blood_group and not normalize_group(blood_group):
+        return jsonify({"msg": "Unknown blood group"}), 400
+
+    def fetch_rows(ids):
+        query = BloodBank.query.filter(BloodBank.id.in_(ids))
+        if blood_group:
+            query = query.filter(BloodBank.has_blood_group(GROUP_BITS[blood_group]))
+        return {b.id: b for b in query.all()}
+
+    results = []
+    max_candidates = current_app.config.get("NEARBY_MAX_CANDIDATES")
+    for bank, distance in nearest_matching(blood_bank_index, lat, lng, k, radius_km, fetch_rows, max_candidates):
+        item = bank.to_dict()
+        item["distanceKm"] = round(distance, 2)
+        results.append(item)
+    return jsonify(results), 200
 
 @blood_bank_bp.route('/my', methods=["GET"])
 @jwt_required()
@@ -90,7 +198,8 @@ def get_my_blood_banks():
 @jwt_required()
 def delete_blood_bank(id):
     user_id = int(get_jwt_identity())
-    bank = BloodBank.query.get(id)
+    # Locked for the same reason as a city change (see create_blood_bank)
+    bank = BloodBank.query.filter_by(id=id).with_for_update().first()
 
     if not bank:
         return jsonify({"msg": "Blood bank not found"}), 404
@@ -99,8 +208,21 @@ def delete_blood_bank(id):
         return jsonify({"msg": "Unauthorized"}), 403
 
     try:
+        CityStock.move_bank(id, bank.city_id, None)
+        # The bank's stock goes with it; synced clients hold those rows
+        # too, so each one leaves a tombstone
+        stock_ids = db.session.execute(
+            db.select(BloodStock.id).where(BloodStock.blood_bank_id == id)
+        ).scalars().all()
+        db.session.execute(db.delete(BloodStock).where(BloodStock.blood_bank_id == id))
+        for stock_id in stock_ids:
+            Tombstone.record("bloodStock", stock_id)
         db.session.delete(bank)
+        Tombstone.record("bloodBank", id)
         db.session.commit()
+        bank_lookup.invalidate(user_id)
+        blood_bank_index.remove(id)
+        response_cache.invalidate("bloodbanks")
         return jsonify({"msg": "Blood bank deleted"}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,9 +1,13 @@
 from flask import Blueprint
 from flask_jwt_extended import jwt_required
-from controllers.blood_stock_controller import get_stock, add_stock_entry, update_stock
+from controllers.blood_stock_controller import get_stock, add_stock_entry, update_stock, bulk_update_stock, adjust_stock, get_stock_trends, get_city_availability
 
 blood_stock_bp = Blueprint('blood_stock_bp', __name__)
 
 blood_stock_bp.route('/', methods=['GET'])(jwt_required()(get_stock))
 blood_stock_bp.route('/', methods=['POST'])(jwt_required()(add_stock_entry))
 blood_stock_bp.route('/', methods=['PUT'])(jwt_required()(update_stock))
+blood_stock_bp.route('/bulk', methods=['PUT'])(jwt_required()(bulk_update_stock))
+blood_stock_bp.route('/adjust', methods=['POST'])(jwt_required()(adjust_stock))
+blood_stock_bp.route('/trends', methods=['GET'])(get_stock_trends)
+blood_stock_bp.route('/availability', methods=['GET'])(get_city_availability)
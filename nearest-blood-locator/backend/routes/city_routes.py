@@ -0,0 +1,19 @@
+from flask import Blueprint, request, jsonify
+from utils.city_index import city_index
+from utils.pagination import get_page_size
+
+city_bp = Blueprint('city_bp', __name__)
+
+@city_bp.route('/autocomplete', methods=['GET'])
+def autocomplete_cities():
+    # Called on every keystroke of the city inputs; answered from the
+    # in-memory sorted array without a query
+    try:
+        limit = get_page_size(request.args, default=10, maximum=50)
+    except ValueError:
+        return jsonify({"msg": "limit must be a number"}), 400
+
+    matches = city_index.prefix(request.args.get('q', ''), limit)
+    response = jsonify([{"id": city_id, "name": name} for city_id, name in matches])
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return response, 200
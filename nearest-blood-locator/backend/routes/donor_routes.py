@@ -1,7 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import false
 from extensions import db
 from models import User, Donor
+from utils.spatial_index import donor_index, nearest_matching
+from utils.location_helper import parse_nearby_args, parse_point, parse_radius_args, radius_search
+from utils.cache import response_cache
+from utils.city_index import city_index
+from utils.conditional import Watermark
+from utils.serialization import json_response, ndjson_response, parse_fields, use_fast_path, wants_ndjson
 import datetime
 
 donor_bp = Blueprint('donor_bp', __name__)
@@ -20,6 +27,16 @@ def create_or_update_donor():
 
     # Check if donor profile exists
     donor = Donor.query.filter_by(user_id=user_id).first()
+
+    # Validated before anything is written: the spatial index update runs
+    # after the commit and cannot take a bad point
+    try:
+        latitude, longitude = parse_point(
+            data.get('latitude', donor.latitude if donor else None),
+            data.get('longitude', donor.longitude if donor else None)
+        )
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     
     if donor:
         # Update existing
@@ -27,10 +44,13 @@ def create_or_update_donor():
             donor.age = int(data['age'])
         if 'city' in data:
             donor.city = data['city']
+            donor.city_id = city_index.resolve(data['city'])
         if 'phone' in data:
             donor.phone = data['phone']
         if 'availabilityStatus' in data:
             donor.availability_status = bool(data['availabilityStatus'])
+        donor.latitude = latitude
+        donor.longitude = longitude
             
         msg = "Donor profile updated"
     else:
@@ -57,31 +77,104 @@ def create_or_update_donor():
             age=int(data.get('age', 0)) if data.get('age') else None,
             phone=phone,
             city=city,
-            availability_status=data.get('availabilityStatus', True)
+            city_id=city_index.resolve(city),
+            availability_status=data.get('availabilityStatus', True),
+            latitude=latitude,
+            longitude=longitude
         )
         db.session.add(donor)
         msg = "Donor profile created"
 
     try:
         db.session.commit()
+        donor_index.upsert(donor.id, donor.latitude, donor.longitude)
+        response_cache.invalidate("donors")
         return jsonify({"msg": msg, "donor": donor.to_dict()}), 200 # 200 for both update/create for simplicity, or 201 for create
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Operation failed", "error": str(e)}), 500
 
 @donor_bp.route('/', methods=['GET'])
+@response_cache.cached("donors", bypass=wants_ndjson)
 def get_donors():
     blood_group = request.args.get('bloodGroup', '').strip().upper()
     city = request.args.get('location', '').strip().lower()
 
+    try:
+        radius = parse_radius_args(request.args)
+        # fields= becomes the SELECT list; the radius filter still needs
+        # coordinates even when they are not returned
+        fields = parse_fields(request.args)
+        rows = Donor.list_rows.only(fields, hidden=(Donor.latitude, Donor.longitude) if radius else ())
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
     query = Donor.query
     if blood_group:
         query = query.filter_by(blood_group=blood_group)
     if city:
-        query = query.filter(Donor.city.ilike(f"%{city}%"))
+        # The term names one city, or is a prefix of a few; either way an
+        # indexed integer match instead of a scan with LIKE '%term%'
+        city_ids = city_index.search_ids(city)
+        query = query.filter(Donor.city_id.in_(city_ids) if city_ids else false())
+
+    # One aggregate query decides whether the client's copy is current
+    watermark = Watermark.of(query, Donor.updated_at)
+    if watermark.is_fresh():
+        return watermark.not_modified()
+    return watermark.apply(_donor_list(query, rows, fields, radius)), 200
+
+def _donor_list(query, rows, fields, radius):
+    """Response body in the representation the client asked for"""
+    # Exports: rows go out as they are read. Radius results are sorted by
+    # distance, so they always need the full set first.
+    if not radius and wants_ndjson():
+        batch_size = current_app.config.get("STREAM_BATCH_SIZE", 500)
+        return ndjson_response(rows.stream(query, batch_size))
+
+    if fields or use_fast_path():
+        if radius:
+            matches = radius_search(rows.select(query), Donor, *radius)
+            results = rows.to_dicts([row for row, _ in matches])
+            for item, (_, distance) in zip(results, matches):
+                item["distanceKm"] = round(distance, 2)
+            return json_response(results)
+        return json_response(rows.serialize(query))
+
+    if radius:
+        results = []
+        for donor, distance in radius_search(query, Donor, *radius):
+            item = donor.to_dict()
+            item["distanceKm"] = round(distance, 2)
+            results.append(item)
+        return jsonify(results)
     
     donors = query.all()
-    return jsonify([d.to_dict() for d in donors]), 200
+    return jsonify([d.to_dict() for d in donors])
+
+@donor_bp.route('/nearby', methods=['GET'])
+@response_cache.cached("donors")
+def get_nearby_donors():
+    try:
+        lat, lng, k, radius_km = parse_nearby_args(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    blood_group = request.args.get('bloodGroup', '').strip().upper()
+
+    def fetch_rows(ids):
+        query = Donor.query.filter(Donor.id.in_(ids))
+        if blood_group:
+            query = query.filter_by(blood_group=blood_group)
+        return {d.id: d for d in query.all()}
+
+    results = []
+    max_candidates = current_app.config.get("NEARBY_MAX_CANDIDATES")
+    for donor, distance in nearest_matching(donor_index, lat, lng, k, radius_km, fetch_rows, max_candidates):
+        item = donor.to_dict()
+        item["distanceKm"] = round(distance, 2)
+        results.append(item)
+    return jsonify(results), 200
 
 @donor_bp.route('/me', methods=['GET'])
 @jwt_required()
@@ -0,0 +1,53 @@
+import queue
+from flask import Blueprint, request, Response, current_app
+from utils.city_index import city_index
+from utils.events import event_broker, format_sse
+
+event_bp = Blueprint('event_bp', __name__)
+
+def _split(value, upper=False):
+    items = {item.strip() for item in (value or "").split(",") if item.strip()}
+    return {item.upper() if upper else item.lower() for item in items}
+
+def _city_ids(value):
+    # Any spelling or alias of a city, as the list filters; None for no filter
+    names = _split(value)
+    if not names:
+        return None
+    city_ids = {city_index.find(name) for name in names}
+    city_ids.discard(None)
+    return city_ids
+
+@event_bp.route('/stream', methods=['GET'])
+def stream_events():
+    # Each open stream parks on a queue; run under an async server
+    # (serve_async.py or gunicorn -k gevent) so idle clients cost a
+    # greenlet rather than a worker thread.
+    subscription = event_broker.subscribe(
+        blood_groups=_split(request.args.get('bloodGroup'), upper=True),
+        city_ids=_city_ids(request.args.get('city')),
+        types=_split(request.args.get('types')),
+    )
+    backlog = event_broker.replay_since(request.headers.get('Last-Event-ID'), subscription)
+    keepalive = current_app.config.get("EVENTS_KEEPALIVE_SECONDS", 15)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield format_sse(event)
+            while True:
+                try:
+                    event = subscription.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
@@ -0,0 +1,47 @@
+import math
+from flask import Blueprint, request, jsonify
+from utils.geocoder import gazetteer, GeocoderUnavailable
+from utils.location_helper import is_valid_point
+
+geo_bp = Blueprint('geo_bp', __name__)
+
+def _answer(place):
+    # Gazetteer answers only change when the file is rebuilt
+    if place is None:
+        return jsonify({"msg": "No matching place"}), 404
+    response = jsonify(place.to_dict())
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return response, 200
+
+@geo_bp.route('/reverse', methods=['GET'])
+def reverse_geocode():
+    # Replaces the browser's per-click Nominatim call in the
+    # "detect location" buttons
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args.get('lon') or request.args['lng'])
+        max_km = request.args.get('maxKm')
+        max_km = float(max_km) if max_km else None
+    except (KeyError, ValueError):
+        return jsonify({"msg": "lat and lon are required numbers"}), 400
+    if not is_valid_point(lat, lon):
+        return jsonify({"msg": "lat/lon out of range"}), 400
+    # The search cost grows with the radius, so callers may only narrow it
+    if max_km is not None and not (math.isfinite(max_km) and 0 < max_km <= gazetteer.max_distance_km):
+        return jsonify({"msg": f"maxKm must be a number in (0, {gazetteer.max_distance_km:g}]"}), 400
+
+    try:
+        return _answer(gazetteer.reverse(lat, lon, max_km))
+    except GeocoderUnavailable as e:
+        return jsonify({"msg": str(e)}), 503
+
+@geo_bp.route('/forward', methods=['GET'])
+def forward_geocode():
+    city = request.args.get('city', '').strip()
+    if not city:
+        return jsonify({"msg": "city is required"}), 400
+
+    try:
+        return _answer(gazetteer.forward(city, request.args.get('country')))
+    except GeocoderUnavailable as e:
+        return jsonify({"msg": str(e)}), 503
@@ -0,0 +1,189 @@
+import math
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, literal, union_all, cast, null, and_, or_, case, func
+from extensions import db
+from models import Recipient, Donor, BloodBank, BloodStock
+from utils.blood_groups import compatible_donor_groups
+from utils.location_helper import bounding_box, haversine_distances
+
+match_bp = Blueprint('match_bp', __name__)
+
+def _box_filter(model, box):
+    min_lat, max_lat, min_lon, max_lon = box
+    lon_filter = (
+        model.longitude.between(min_lon, max_lon) if min_lon <= max_lon
+        else or_(model.longitude >= min_lon, model.longitude <= max_lon)
+    )
+    return and_(model.latitude.between(min_lat, max_lat), lon_filter)
+
+def _rank_columns(model, recipient):
+    """
+    ORDER BY terms shared by the donor and bank candidate queries
+
+    Rows without coordinates go last, then by an equirectangular squared
+    distance (plain arithmetic, so any dialect can sort on it), then rows
+    in the recipient's city first. Python re-sorts the survivors by exact
+    Haversine distance.
+    """
+    same_city = [] if recipient.city_id is None else [case((model.city_id == recipient.city_id, 0), else_=1)]
+    if recipient.latitude is None or recipient.longitude is None:
+        return same_city
+    scale = math.cos(math.radians(recipient.latitude))
+    dlat = model.latitude - recipient.latitude
+    dlon = (model.longitude - recipient.longitude) * scale
+    return [
+        case((model.latitude.is_(None), 1), (model.longitude.is_(None), 1), else_=0),
+        dlat * dlat + dlon * dlon,
+    ] + same_city
+
+@match_bp.route('/<int:recipient_id>', methods=['GET'])
+def match_recipient(recipient_id):
+    recipient = Recipient.query.get(recipient_id)
+    if not recipient:
+        return jsonify({"msg": "Request not found"}), 404
+
+    groups = compatible_donor_groups(recipient.required_blood_group)
+    if not groups:
+        return jsonify({"msg": "Unknown blood group on request"}), 400
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 200))
+        radius_km = request.args.get('radiusKm')
+        radius_km = float(radius_km) if radius_km else None
+    except ValueError:
+        return jsonify({"msg": "limit and radiusKm must be numbers"}), 400
+    if radius_km is not None and not (math.isfinite(radius_km) and radius_km > 0):
+        return jsonify({"msg": "radiusKm must be a positive number"}), 400
+
+    has_coords = recipient.latitude is not None and recipient.longitude is not None
+
+    donors_q = select(
+        literal('donor').label('kind'),
+        Donor.id.label('id'),
+        Donor.name.label('name'),
+        Donor.blood_group.label('blood_group'),
+        Donor.city.label('city'),
+        Donor.city_id.label('city_id'),
+        Donor.latitude.label('latitude'),
+        Donor.longitude.label('longitude'),
+        Donor.phone.label('phone'),
+        cast(null(), db.Integer).label('quantity'),
+    ).where(Donor.blood_group.in_(groups), Donor.availability_status.is_(True))
+
+    banks_q = select(
+        literal('bank').label('kind'),
+        BloodBank.id.label('id'),
+        BloodBank.name.label('name'),
+        BloodStock.blood_group.label('blood_group'),
+        BloodBank.city.label('city'),
+        BloodBank.city_id.label('city_id'),
+        BloodBank.latitude.label('latitude'),
+        BloodBank.longitude.label('longitude'),
+        BloodBank.contact_number.label('phone'),
+        BloodStock.quantity.label('quantity'),
+    ).join(BloodBank, BloodBank.id == BloodStock.blood_bank_id).where(
+        BloodStock.blood_group.in_(groups), BloodStock.quantity > 0
+    )
+
+    # Banks are ranked as a whole (all compatible units), then their
+    # stock rows are joined back for the per-group breakdown
+    bank_ids_q = (
+        select(BloodBank.id.label('id'))
+        .join(BloodStock, BloodBank.id == BloodStock.blood_bank_id)
+        .where(BloodStock.blood_group.in_(groups), BloodStock.quantity > 0)
+    )
+
+    if has_coords and radius_km:
+        box = bounding_box(recipient.latitude, recipient.longitude, radius_km)
+        donors_q = donors_q.where(_box_filter(Donor, box))
+        bank_ids_q = bank_ids_q.where(_box_filter(BloodBank, box))
+
+    # Only the best candidates leave the database. The SQL distance is an
+    # approximation, so twice the limit is read and the exact ranking
+    # below picks the final list.
+    candidates = 2 * limit
+    donors_q = donors_q.order_by(
+        *_rank_columns(Donor, recipient),
+        case((Donor.blood_group == recipient.required_blood_group, 0), else_=1),
+        Donor.id,
+    ).limit(candidates).subquery()
+    bank_ids_q = bank_ids_q.group_by(BloodBank.id).order_by(
+        *_rank_columns(BloodBank, recipient),
+        func.sum(BloodStock.quantity).desc(),
+        BloodBank.id,
+    ).limit(candidates).subquery()
+    banks_q = banks_q.join(bank_ids_q, bank_ids_q.c.id == BloodBank.id)
+
+    # Donors and stocked banks come back in one statement
+    rows = db.session.execute(union_all(select(donors_q), banks_q)).all()
+
+    if has_coords and rows:
+        distances = haversine_distances(
+            recipient.latitude, recipient.longitude,
+            [row.latitude for row in rows],
+            [row.longitude for row in rows]
+        ).tolist()
+    else:
+        distances = [float('nan')] * len(rows)
+
+    donors = []
+    banks = {}
+    for row, distance in zip(rows, distances):
+        distance_km = None if distance != distance else round(distance, 2)
+        if has_coords and radius_km and (distance_km is None or distance_km > radius_km):
+            continue
+        if row.kind == 'donor':
+            donors.append({
+                "id": row.id,
+                "name": row.name,
+                "bloodGroup": row.blood_group,
+                "location": row.city,
+                "cityId": row.city_id,
+                "phoneNumber": row.phone,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "distanceKm": distance_km,
+                "exactMatch": row.blood_group == recipient.required_blood_group,
+            })
+        else:
+            bank = banks.get(row.id)
+            if bank is None:
+                bank = banks[row.id] = {
+                    "id": row.id,
+                    "cityId": row.city_id,
+                    "name": row.name,
+                    "city": row.city,
+                    "contactNumber": row.phone,
+                    "latitude": row.latitude,
+                    "longitude": row.longitude,
+                    "distanceKm": distance_km,
+                    "compatibleStock": {},
+                    "totalUnits": 0,
+                }
+            bank["compatibleStock"][row.blood_group] = row.quantity
+            bank["totalUnits"] += row.quantity
+
+    def donor_rank(item):
+        return (
+            item["distanceKm"] is None,
+            item["distanceKm"] or 0,
+            recipient.city_id is None or item["cityId"] != recipient.city_id,
+            not item["exactMatch"],
+            item["id"],
+        )
+
+    def bank_rank(item):
+        return (
+            item["distanceKm"] is None,
+            item["distanceKm"] or 0,
+            recipient.city_id is None or item["cityId"] != recipient.city_id,
+            -item["totalUnits"],
+            item["id"],
+        )
+
+    return jsonify({
+        "recipient": recipient.to_dict(),
+        "compatibleGroups": groups,
+        "donors": sorted(donors, key=donor_rank)[:limit],
+        "bloodBanks": sorted(banks.values(), key=bank_rank)[:limit],
+    }), 200
@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import false
 from extensions import db
-from models import User, Recipient
+from models import User, Recipient, Tombstone
+from utils.pagination import get_page_size, keyset_page
+from utils.events import event_broker
+from utils.city_index import city_index
+from utils.conditional import Watermark
+from utils.serialization import json_response, parse_fields, use_fast_path
 
 recipient_bp = Blueprint('recipient_bp', __name__)
 
@@ -38,6 +44,7 @@ def create_or_update_request():
         recipient.required_blood_group = required_blood_group
         recipient.phone = phone
         recipient.city = city
+        recipient.city_id = city_index.resolve(city)
         recipient.urgency_level = data.get('urgencyLevel', 'Medium')
         msg = "Blood request updated"
     else:
@@ -48,6 +55,7 @@ def create_or_update_request():
             required_blood_group=required_blood_group,
             phone=phone,
             city=city,
+            city_id=city_index.resolve(city),
             urgency_level=data.get('urgencyLevel', 'Medium')
         )
         db.session.add(recipient)
@@ -55,6 +63,11 @@ def create_or_update_request():
     
     try:
         db.session.commit()
+        event_broker.publish(
+            "recipient.upserted", recipient.to_dict(),
+            blood_group=recipient.required_blood_group, city=recipient.city,
+            city_id=recipient.city_id
+        )
         return jsonify({"msg": msg, "recipient": recipient.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
@@ -62,9 +75,63 @@ def create_or_update_request():
 
 @recipient_bp.route('/', methods=['GET'])
 def get_all_requests():
-    # Publicly accessible list of requests for dashboards
-    requests = Recipient.query.order_by(Recipient.created_at.desc()).all()
-    return jsonify([r.to_dict() for r in requests]), 200
+    # Publicly accessible list of requests for dashboards.
+    # Newest first. Clients that send limit or cursor are paged, with the
+    # next page's cursor in the X-Next-Cursor header so the body stays a
+    # plain list; without either the whole list comes back, as the
+    # dashboards expect.
+    limit = None
+    if request.args.get('limit') or request.args.get('cursor'):
+        try:
+            limit = get_page_size(
+                request.args,
+                default=current_app.config.get("RECIPIENTS_PAGE_SIZE", 50),
+                maximum=current_app.config.get("RECIPIENTS_MAX_PAGE_SIZE", 200)
+            )
+        except ValueError:
+            return jsonify({"msg": "limit must be a number"}), 400
+
+    fields = parse_fields(request.args)
+    try:
+        rows = Recipient.list_rows.only(fields)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    query = Recipient.query
+    blood_group = request.args.get('requiredBloodGroup', '').strip().upper()
+    city = request.args.get('city', '').strip()
+    urgency_level = request.args.get('urgencyLevel', '').strip()
+    if blood_group:
+        query = query.filter(Recipient.required_blood_group == blood_group)
+    if city:
+        # Any spelling or alias of the city; unknown names match nothing
+        city_id = city_index.find(city)
+        query = query.filter(Recipient.city_id == city_id if city_id is not None else false())
+    if urgency_level:
+        query = query.filter(Recipient.urgency_level == urgency_level)
+
+    # Dashboards poll this list; one aggregate query decides whether the
+    # client's copy is current before any page is read
+    watermark = Watermark.of(query, Recipient.updated_at)
+    if watermark.is_fresh():
+        return watermark.not_modified()
+
+    fast = bool(fields) or use_fast_path()
+    if fast:
+        query = rows.select(query)
+
+    try:
+        requests, next_cursor = keyset_page(query, Recipient, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    if fast:
+        response = json_response(rows.to_dicts(requests))
+    else:
+        response = jsonify([r.to_dict() for r in requests])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return watermark.apply(response), 200
 
 @recipient_bp.route('/', methods=['DELETE'])
 @jwt_required()
@@ -77,7 +144,13 @@ def cancel_request():
         
     try:
         db.session.delete(recipient)
+        Tombstone.record("recipient", recipient.id)
         db.session.commit()
+        event_broker.publish(
+            "recipient.cancelled", {"id": recipient.id},
+            blood_group=recipient.required_blood_group, city=recipient.city,
+            city_id=recipient.city_id
+        )
         return jsonify({"msg": "Blood request cancelled successfully"}), 200
     except Exception as e:
         db.session.rollback()
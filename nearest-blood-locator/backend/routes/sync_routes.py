@@ -0,0 +1,63 @@
+import datetime
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from models import Donor, BloodBank, BloodStock, Recipient, Tombstone
+from utils.serialization import json_response
+
+sync_bp = Blueprint('sync_bp', __name__)
+
+# Response key -> (model, change timestamp column)
+SYNCED = {
+    "donors": (Donor, Donor.updated_at),
+    "bloodBanks": (BloodBank, BloodBank.updated_at),
+    "bloodStock": (BloodStock, BloodStock.last_updated),
+    "recipients": (Recipient, Recipient.updated_at),
+}
+
+def _parse_since(raw):
+    if not raw:
+        return None
+    try:
+        since = datetime.datetime.fromisoformat(raw.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("since must be an ISO-8601 timestamp")
+    if since.tzinfo is not None:
+        since = since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return since
+
+@sync_bp.route('', methods=['GET'])
+@jwt_required()
+def get_changes():
+    # Delta sync for clients that keep a local copy. Without since= this
+    # is a full snapshot; afterwards clients send back the watermark from
+    # the previous response and get only rows created, updated or deleted
+    # since then. Each filter is a range scan on an updated_at index.
+    # Signed-in clients only: a snapshot (or an old since=) is every
+    # table in one response.
+    try:
+        since = _parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # Taken before reading, so anything committed while this runs is
+    # picked up next time. Re-reading a few seconds before since covers
+    # transactions that stamped updated_at earlier than they committed;
+    # clients apply rows as idempotent upserts, so repeats are harmless.
+    watermark = datetime.datetime.utcnow()
+    if since is not None:
+        since -= datetime.timedelta(seconds=current_app.config.get("SYNC_OVERLAP_SECONDS", 5))
+
+    changes = {"watermark": watermark.isoformat() + "Z", "full": since is None}
+    for key, (model, changed_at) in SYNCED.items():
+        query = model.query
+        if since is not None:
+            query = query.filter(changed_at >= since)
+        changes[key] = model.list_rows.serialize(query)
+
+    deleted = []
+    if since is not None:
+        tombstones = Tombstone.query.filter(Tombstone.deleted_at >= since).order_by(Tombstone.deleted_at)
+        deleted = [t.to_dict() for t in tombstones]
+    changes["deleted"] = deleted
+
+    return json_response(changes), 200
@@ -0,0 +1,15 @@
+# Serve the app on gevent so /api/events/stream can hold thousands of
+# idle connections per process.
+# Run with: python serve_async.py   (or: gunicorn -k gevent --worker-connections 5000 app:app)
+
+from gevent import monkey
+monkey.patch_all()
+
+import os
+from gevent.pywsgi import WSGIServer
+from app import app
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", "5000"))
+    print(f"Serving on http://0.0.0.0:{port} (gevent)")
+    WSGIServer(("0.0.0.0", port), app).serve_forever()
@@ -0,0 +1,72 @@
+# Test Fixtures
+# The app on a throwaway SQLite file instead of MySQL, reset for every test
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app
+from extensions import db
+from utils.bank_lookup import bank_lookup
+from utils.cache import response_cache
+from utils.city_index import city_index
+from utils.spatial_index import donor_index, blood_bank_index
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    # A file rather than :memory: so threads get their own connections,
+    # as concurrent requests do against MySQL
+    path = tmp_path_factory.mktemp("db") / "test.sqlite"
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+    )
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        # Swapped before anything connects, so MySQL is never reached
+        db._app_engines[flask_app][None] = engine
+    yield flask_app
+    engine.dispose()
+
+@pytest.fixture(autouse=True)
+def database(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    # Process-wide caches would otherwise remember the previous test's rows
+    bank_lookup._entries.clear()
+    city_index.invalidate()
+    donor_index.invalidate()
+    blood_bank_index.invalidate()
+    response_cache.backend.clear()
+    yield
+    with app.app_context():
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def register(client):
+    """Register a user and return their Authorization header"""
+    def register(username, role="bank", city="Pune", **fields):
+        body = {
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "secret123",
+            "userType": role,
+            "phone": "9999999999",
+            "city": city,
+            **fields,
+        }
+        response = client.post("/api/register", json=body)
+        assert response.status_code == 201, response.get_json()
+        response = client.post("/api/login", json={"username": username, "password": "secret123"})
+        assert response.status_code == 200, response.get_json()
+        return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+    return register
@@ -0,0 +1,98 @@
+import threading
+
+from extensions import db
+from models import BloodBank, BloodStock
+
+def _bank_id(app, register):
+    register("citybank", role="bank")
+    with app.app_context():
+        return BloodBank.query.one().id
+
+def _quantity(app, bank_id, group="A+"):
+    with app.app_context():
+        item = BloodStock.query.filter_by(blood_bank_id=bank_id, blood_group=group).first()
+        return None if item is None else item.quantity
+
+def _adjust(app, bank_id, delta, group="A+"):
+    with app.app_context():
+        quantity = BloodStock.adjust_quantity(bank_id, group, delta)
+        if quantity is None:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        return quantity
+
+def test_receive_creates_row(app, register):
+    bank_id = _bank_id(app, register)
+    assert _adjust(app, bank_id, 4) == 4
+    assert _adjust(app, bank_id, 3) == 7
+    assert _quantity(app, bank_id) == 7
+
+def test_issue_beyond_stock_returns_none(app, register):
+    bank_id = _bank_id(app, register)
+    _adjust(app, bank_id, 2)
+    assert _adjust(app, bank_id, -3) is None
+    assert _quantity(app, bank_id) == 2
+    assert _adjust(app, bank_id, -2) == 0
+
+def test_issue_without_row_returns_none(app, register):
+    bank_id = _bank_id(app, register)
+    assert _adjust(app, bank_id, -1) is None
+    assert _quantity(app, bank_id) is None
+
+def _run_concurrently(app, bank_id, deltas):
+    results = [None] * len(deltas)
+    start = threading.Barrier(len(deltas))
+
+    def worker(position, delta):
+        start.wait()
+        results[position] = _adjust(app, bank_id, delta)
+
+    threads = [threading.Thread(target=worker, args=item) for item in enumerate(deltas)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_adjusts_sum(app, register):
+    bank_id = _bank_id(app, register)
+    _adjust(app, bank_id, 50)
+    deltas = [5, -3, 2, -1] * 5
+    results = _run_concurrently(app, bank_id, deltas)
+    assert None not in results
+    assert _quantity(app, bank_id) == 50 + sum(deltas)
+
+def test_concurrent_issues_never_go_negative(app, register):
+    bank_id = _bank_id(app, register)
+    _adjust(app, bank_id, 5)
+    results = _run_concurrently(app, bank_id, [-1] * 12)
+    assert sum(result is not None for result in results) == 5
+    assert _quantity(app, bank_id) == 0
+
+def test_adjust_endpoint_rejects_overdraw(client, register):
+    headers = register("citybank", role="bank")
+    response = client.post("/api/blood-stock/adjust", json={"bloodGroup": "O-", "delta": 3}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["entry"]["quantity"] == 3
+    response = client.post("/api/blood-stock/adjust", json={"bloodGroup": "O-", "delta": -4}, headers=headers)
+    assert response.status_code == 409
+
+def test_unknown_blood_group_is_rejected(app, client, register):
+    headers = register("citybank", role="bank")
+    for method, path, body in [
+        ("post", "/api/blood-stock/", {"bloodGroup": "XYZ", "quantity": 1}),
+        ("put", "/api/blood-stock/", {"bloodGroup": "XYZ", "quantity": 1}),
+        ("put", "/api/blood-stock/bulk", {"stock": {"XYZ": 1}}),
+        ("post", "/api/blood-stock/adjust", {"bloodGroup": "XYZ", "delta": 1}),
+    ]:
+        response = getattr(client, method)(path, json=body, headers=headers)
+        assert response.status_code == 400, (path, response.get_json())
+    with app.app_context():
+        assert BloodStock.query.count() == 0
+
+def test_blood_group_is_normalized(client, register):
+    headers = register("citybank", role="bank")
+    response = client.post("/api/blood-stock/", json={"bloodGroup": " ab- ", "quantity": 2}, headers=headers)
+    assert response.status_code == 201
+    assert response.get_json()["entry"]["bloodGroup"] == "AB-"
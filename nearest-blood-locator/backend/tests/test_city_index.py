@@ -0,0 +1,37 @@
+from extensions import db
+from utils.city_index import city_index
+from utils.events import event_broker
+
+def _autocomplete(client, text):
+    return [city["name"] for city in client.get(f"/api/cities/autocomplete?q={text}").get_json()]
+
+def test_new_city_is_searchable_at_once(client, register):
+    register("bank1", role="bank", city="Pune")
+    assert _autocomplete(client, "pu") == ["Pune"]  # array now loaded
+    register("bank2", role="bank", city="Punalur")
+    assert sorted(_autocomplete(client, "pun")) == ["Punalur", "Pune"]
+
+def test_rolled_back_city_is_not_added(app, client, register):
+    register("bank1", role="bank", city="Pune")
+    assert _autocomplete(client, "pu") == ["Pune"]
+    with app.app_context():
+        city_index.resolve("Puri")
+        db.session.rollback()
+    assert _autocomplete(client, "pu") == ["Pune"]
+
+def test_event_filter_uses_city_id(app, client, register):
+    headers = register("bank1", role="bank", city="Pune")
+    with app.test_request_context():
+        from routes.event_routes import _city_ids
+        pune = _city_ids("PUNE")
+        unknown = _city_ids("Atlantis")
+        assert _city_ids("") is None
+    matching = event_broker.subscribe(city_ids=pune)
+    other = event_broker.subscribe(city_ids=unknown)
+    try:
+        client.post("/api/blood-stock/", json={"bloodGroup": "A+", "quantity": 1}, headers=headers)
+        assert matching.queue.get_nowait()["type"] == "stock.added"
+        assert other.queue.empty()
+    finally:
+        event_broker.unsubscribe(matching)
+        event_broker.unsubscribe(other)
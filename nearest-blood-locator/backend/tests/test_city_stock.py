@@ -0,0 +1,87 @@
+import pytest
+
+from models import BloodBank, BloodStock, CityStock
+from utils.city_index import city_index
+
+@pytest.fixture
+def bank(register):
+    return register("citybank", role="bank", city="Pune")
+
+def _drift(app):
+    with app.app_context():
+        return CityStock.drift()
+
+def _units(app, city):
+    with app.app_context():
+        city_id = city_index.find(city)
+        return {
+            row.blood_group: row.units
+            for row in CityStock.query.filter_by(city_id=city_id)
+        }
+
+def _add(client, headers, group, quantity):
+    response = client.post("/api/blood-stock/", json={"bloodGroup": group, "quantity": quantity}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+
+def test_add(app, client, bank):
+    _add(client, bank, "A+", 4)
+    _add(client, bank, "O-", 2)
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"A+": 4, "O-": 2}
+
+def test_duplicate_add_is_not_counted(app, client, bank):
+    _add(client, bank, "A+", 4)
+    response = client.post("/api/blood-stock/", json={"bloodGroup": "A+", "quantity": 9}, headers=bank)
+    assert response.status_code == 409
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"A+": 4}
+
+def test_update(app, client, bank):
+    _add(client, bank, "B+", 10)
+    response = client.put("/api/blood-stock/", json={"bloodGroup": "B+", "quantity": 3}, headers=bank)
+    assert response.status_code == 200
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"B+": 3}
+
+def test_bulk(app, client, bank):
+    _add(client, bank, "A+", 1)
+    # A+ exists, AB- and O+ are first inserts
+    response = client.put("/api/blood-stock/bulk", json={"stock": {"A+": 6, "AB-": 2, "O+": 5}}, headers=bank)
+    assert response.status_code == 200, response.get_json()
+    response = client.put("/api/blood-stock/bulk", json={"stock": {"AB-": 1}}, headers=bank)
+    assert response.status_code == 200, response.get_json()
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"A+": 6, "AB-": 1, "O+": 5}
+
+def test_adjust(app, client, bank):
+    for delta in (5, -2, 3):
+        response = client.post("/api/blood-stock/adjust", json={"bloodGroup": "A-", "delta": delta}, headers=bank)
+        assert response.status_code == 200
+    response = client.post("/api/blood-stock/adjust", json={"bloodGroup": "A-", "delta": -20}, headers=bank)
+    assert response.status_code == 409
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"A-": 6}
+
+def test_bank_moves_city(app, client, bank):
+    _add(client, bank, "A+", 4)
+    response = client.post("/api/bloodbanks/", json={
+        "name": "City Bank", "city": "Mumbai", "contactNumber": "9999999999",
+    }, headers=bank)
+    assert response.status_code == 200, response.get_json()
+    _add(client, bank, "O+", 2)
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"A+": 0}
+    assert _units(app, "Mumbai") == {"A+": 4, "O+": 2}
+
+def test_bank_delete(app, client, bank, register):
+    other = register("otherbank", role="bank", city="Pune")
+    _add(client, bank, "A+", 4)
+    _add(client, other, "A+", 1)
+    with app.app_context():
+        bank_id = BloodBank.query.filter_by(name="citybank").one().id
+    response = client.delete(f"/api/bloodbanks/{bank_id}", headers=bank)
+    assert response.status_code == 200, response.get_json()
+    assert _drift(app) == []
+    assert _units(app, "Pune") == {"A+": 1}
+    with app.app_context():
+        assert BloodStock.query.filter_by(blood_bank_id=bank_id).count() == 0
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from utils.events import EventBroker
+
+class StopListening(BaseException):
+    """Ends the listener loop; not an Exception, so it is not retried"""
+
+class FakePubSub:
+    def __init__(self, messages, error):
+        self.messages = messages
+        self.error = error
+
+    def subscribe(self, channel):
+        pass
+
+    def listen(self):
+        yield from self.messages
+        raise self.error
+
+    def close(self):
+        pass
+
+class FakeRedis:
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+
+    def pubsub(self, ignore_subscribe_messages=True):
+        return self.sessions.pop(0)
+
+def _event(number):
+    return {"data": json.dumps({"id": f"1-{number}", "type": "stock.updated", "bloodGroup": "A+",
+                                "city": "Pune", "cityId": 1, "data": {}})}
+
+def test_listener_skips_bad_messages_and_resubscribes(monkeypatch):
+    monkeypatch.setattr("utils.events.time.sleep", lambda seconds: None)
+    broker = EventBroker()
+    broker._redis = FakeRedis([
+        FakePubSub([_event(1), {"data": b"{not json"}, {"data": "[]"}, _event(2)], ConnectionError("dropped")),
+        FakePubSub([_event(3)], StopListening()),
+    ])
+    subscription = broker.subscribe()
+    with pytest.raises(StopListening):
+        broker._listen()
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.queue.get_nowait()["id"])
+    assert received == ["1-1", "1-2", "1-3"]
@@ -0,0 +1,71 @@
+import pytest
+
+from models import BloodBank, Donor
+from utils.spatial_index import GridIndex, nearest_matching
+
+@pytest.mark.parametrize("latitude, longitude", [
+    ("abc", 73.8), ("nan", 73.8), (18.5, "inf"), (91, 0), (18.5, None),
+])
+def test_donor_rejects_bad_coordinates(app, client, register, latitude, longitude):
+    headers = register("donor1", role="donor", bloodGroup="A+")
+    response = client.post("/api/donors/", json={"latitude": latitude, "longitude": longitude}, headers=headers)
+    assert response.status_code == 400
+    with app.app_context():
+        donor = Donor.query.one()
+        assert (donor.latitude, donor.longitude) == (None, None)
+
+def test_donor_keeps_zero_coordinates(client, register):
+    headers = register("donor1", role="donor", bloodGroup="A+")
+    response = client.post("/api/donors/", json={"latitude": 0, "longitude": 0}, headers=headers)
+    assert response.status_code == 200
+    assert (response.get_json()["donor"]["latitude"], response.get_json()["donor"]["longitude"]) == (0, 0)
+
+def test_donor_moves_one_coordinate(client, register):
+    headers = register("donor1", role="donor", bloodGroup="A+", latitude=18.5, longitude=73.8)
+    response = client.post("/api/donors/", json={"latitude": 19.0}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["donor"]["latitude"] == 19.0
+    assert response.get_json()["donor"]["longitude"] == 73.8
+
+def test_bank_rejects_bad_coordinates(app, client, register):
+    headers = register("bank1", role="bank")
+    response = client.post("/api/bloodbanks/", json={
+        "name": "Bank", "city": "Mumbai", "contactNumber": "1", "latitude": "nan", "longitude": 72.8,
+    }, headers=headers)
+    assert response.status_code == 400
+    with app.app_context():
+        assert BloodBank.query.one().city == "Pune"
+
+class CountingIndex(GridIndex):
+    def __init__(self):
+        super().__init__()
+        self.fetches = []
+
+    def nearest(self, lat, lon, k, max_distance_km=None):
+        self.fetches.append(k)
+        return super().nearest(lat, lon, k, max_distance_km)
+
+def test_nearest_matching_stops_at_index_size():
+    index = CountingIndex()
+    for key in range(100):
+        index.upsert(key, 18 + key / 1000, 73)
+    # Nothing passes the filter: the search must give up once it has seen everything
+    assert nearest_matching(index, 18, 73, 5, fetch_rows=lambda keys: {}) == []
+    assert index.fetches == [5, 20, 80, 100]
+
+def test_nearest_matching_respects_max_candidates():
+    index = CountingIndex()
+    for key in range(100):
+        index.upsert(key, 18 + key / 1000, 73)
+    rows = lambda keys: {key: key for key in keys if key >= 90}
+    assert nearest_matching(index, 18, 73, 5, fetch_rows=rows, max_candidates=30) == []
+    assert index.fetches == [5, 20, 30]
+
+@pytest.mark.parametrize("latitude, longitude", [("nan", 1), ("abc", 2), (10, None)])
+def test_register_rejects_bad_coordinates(client, latitude, longitude):
+    response = client.post("/api/register", json={
+        "username": "donor1", "email": "donor1@example.com", "password": "secret123",
+        "userType": "donor", "bloodGroup": "A+", "city": "Pune",
+        "latitude": latitude, "longitude": longitude,
+    })
+    assert response.status_code == 400
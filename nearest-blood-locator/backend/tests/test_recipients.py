@@ -0,0 +1,40 @@
+def _post_requests(register, count):
+    for number in range(count):
+        register(f"recipient{number}", role="recipient", bloodGroup="A+")
+
+def test_list_without_paging_returns_everything(client, register):
+    _post_requests(register, 3)
+    response = client.get("/api/recipients/")
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
+    assert "X-Next-Cursor" not in response.headers
+
+def test_limit_pages_with_cursor(client, register):
+    _post_requests(register, 3)
+    response = client.get("/api/recipients/?limit=2")
+    first = response.get_json()
+    cursor = response.headers["X-Next-Cursor"]
+    assert len(first) == 2
+
+    response = client.get(f"/api/recipients/?limit=2&cursor={cursor}")
+    second = response.get_json()
+    assert "X-Next-Cursor" not in response.headers
+    assert len(second) == 1
+    assert {r["id"] for r in first} | {r["id"] for r in second} == {1, 2, 3}
+
+def test_bad_limit_is_rejected(client):
+    assert client.get("/api/recipients/?limit=abc").status_code == 400
+
+def test_etag_changes_when_an_older_request_is_updated(client, register):
+    first = register("recipient0", role="recipient", bloodGroup="A+")
+    register("recipient1", role="recipient", bloodGroup="B+")
+    etag = client.get("/api/recipients/").headers["ETag"]
+    assert client.get("/api/recipients/", headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.post("/api/recipients/", json={
+        "requiredBloodGroup": "O-", "city": "Pune", "phone": "1",
+    }, headers=first)
+    assert response.status_code == 201
+    response = client.get("/api/recipients/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
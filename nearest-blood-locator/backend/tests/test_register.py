@@ -0,0 +1,31 @@
+import pytest
+
+from models.user import User
+
+def _register(client, username, email):
+    return client.post("/api/register", json={
+        "username": username, "email": email, "password": "secret123",
+        "userType": "donor", "bloodGroup": "A+", "city": "Pune",
+    })
+
+def test_duplicate_username_containing_email(client):
+    assert _register(client, "email_fan", "one@example.com").status_code == 201
+    response = _register(client, "email_fan", "two@example.com")
+    assert response.status_code == 409
+    assert response.get_json()["field"] == "username"
+
+def test_duplicate_email(client):
+    assert _register(client, "first", "same@example.com").status_code == 201
+    response = _register(client, "second", "same@example.com")
+    assert response.status_code == 409
+    assert response.get_json()["field"] == "email"
+
+@pytest.mark.parametrize("message, field", [
+    ("(1062, \"Duplicate entry 'email_fan' for key 'users.ix_users_username'\")", "username"),
+    ("(1062, \"Duplicate entry 'a@b.c' for key 'users.ix_users_email'\")", "email"),
+    ("(1062, \"Duplicate entry '5' for key 'donors.user_id'\")", None),
+    ("(1048, \"Column 'email' cannot be null\")", None),
+    ("NOT NULL constraint failed: users.email", None),
+])
+def test_duplicate_field_reads_the_key(message, field):
+    assert User.duplicate_field(Exception(message)) == field
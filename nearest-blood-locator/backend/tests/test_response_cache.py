@@ -0,0 +1,18 @@
+from werkzeug.datastructures import MultiDict
+
+from utils.cache import ResponseCache
+
+def test_only_filter_values_are_case_folded():
+    normalize = ResponseCache.normalize_args
+    assert normalize(MultiDict({"bloodGroup": "a+", "location": " Pune"})) == \
+        normalize(MultiDict({"location": "pune", "bloodGroup": "A+"}))
+    assert normalize(MultiDict({"cursor": "AbC"})) != normalize(MultiDict({"cursor": "abc"}))
+    assert normalize(MultiDict({"fields": "id,Name"})) != normalize(MultiDict({"fields": "id,name"}))
+
+def test_serializer_header_is_part_of_the_key(client, register):
+    register("bank1", role="bank")
+    fast = client.get("/api/bloodbanks/")
+    assert fast.headers["X-Cache"] == "MISS"
+    orm = client.get("/api/bloodbanks/", headers={"X-Serializer": "orm"})
+    assert orm.headers["X-Cache"] == "MISS"
+    assert client.get("/api/bloodbanks/", headers={"X-Serializer": "orm"}).headers["X-Cache"] == "HIT"
@@ -0,0 +1,12 @@
+def test_sync_requires_login(client):
+    assert client.get("/api/sync").status_code == 401
+    assert client.get("/api/sync?since=1970-01-01T00:00:00Z").status_code == 401
+
+def test_sync_snapshot_and_delta(client, register):
+    headers = register("bank1", role="bank")
+    snapshot = client.get("/api/sync", headers=headers).get_json()
+    assert snapshot["full"] is True
+    assert len(snapshot["bloodBanks"]) == 1
+
+    delta = client.get(f"/api/sync?since={snapshot['watermark']}", headers=headers).get_json()
+    assert delta["full"] is False
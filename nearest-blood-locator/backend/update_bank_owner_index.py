@@ -0,0 +1,19 @@
+from app import app, db
+from sqlalchemy import text
+
+# Index behind the user -> bank lookup on the blood-stock endpoints
+INDEXES = [
+    "CREATE INDEX ix_blood_banks_created_by ON blood_banks (created_by)",
+]
+
+with app.app_context():
+    print("Adding blood bank owner index...")
+    with db.engine.connect() as conn:
+        for statement in INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (index might already exist): {e}")
@@ -0,0 +1,95 @@
+from app import app, db
+from sqlalchemy import text
+from models import City, CityAlias  # Import to register with SQLAlchemy
+from models.city import normalize_city
+from utils.city_index import city_index
+from utils.sql_helpers import upsert
+
+TABLES = ["donors", "recipients", "blood_banks"]
+
+COLUMNS = [
+    f"ALTER TABLE {table} ADD COLUMN city_id INT NULL, "
+    f"ADD CONSTRAINT fk_{table}_city_id FOREIGN KEY (city_id) REFERENCES cities (id)"
+    for table in TABLES
+]
+
+INDEXES = [
+    "CREATE INDEX ix_donors_city_id ON donors (city_id)",
+    "CREATE INDEX ix_blood_banks_city_id ON blood_banks (city_id)",
+    "CREATE INDEX ix_recipients_city_id_created_id ON recipients (city_id, created_at, id)",
+]
+
+# Canonical name -> other names people type for it
+ALIASES = {
+    "Mumbai": ["Bombay"],
+    "Bengaluru": ["Bangalore"],
+    "Chennai": ["Madras"],
+    "Kolkata": ["Calcutta"],
+    "Pune": ["Poona"],
+    "Gurugram": ["Gurgaon"],
+    "Thiruvananthapuram": ["Trivandrum"],
+    "Kochi": ["Cochin"],
+    "Mysuru": ["Mysore"],
+    "Vadodara": ["Baroda"],
+    "Varanasi": ["Benares", "Banaras"],
+    "Prayagraj": ["Allahabad"],
+    "Puducherry": ["Pondicherry"],
+}
+
+with app.app_context():
+    print("Creating 'cities' and 'city_aliases' tables...")
+    try:
+        db.create_all()  # Only creates tables that are missing
+        print("✅ Tables are ready.")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    print("Adding 'city_id' columns and indexes...")
+    with db.engine.connect() as conn:
+        for statement in COLUMNS + INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (column or index might already exist): {e}")
+
+    print("Seeding canonical cities and aliases...")
+    try:
+        for name, aliases in ALIASES.items():
+            city_id = city_index.resolve(name)
+            for alias in aliases:
+                key = normalize_city(alias)
+                if db.session.execute(db.select(City.id).where(City.name_key == key)).scalar():
+                    print(f"⚠️ '{alias}' is already a city of its own; not aliased to {name}")
+                    continue
+                db.session.execute(upsert(
+                    CityAlias, [{"alias_key": key, "city_id": city_id}], ["alias_key"],
+                    lambda new: {"city_id": new.city_id}
+                ))
+        db.session.commit()
+        print(f"✅ Seeded {len(ALIASES)} cities.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error: {e}")
+
+    print("Backfilling 'city_id' from the free-text city columns...")
+    for table in TABLES:
+        try:
+            names = db.session.execute(text(f"SELECT DISTINCT city FROM {table}")).scalars().all()
+            for name in names:
+                city_id = city_index.resolve(name)
+                db.session.execute(
+                    text(f"UPDATE {table} SET city_id = :city_id WHERE city = :city"),
+                    {"city_id": city_id, "city": name}
+                )
+            db.session.commit()
+            print(f"✅ {table}: {len(names)} distinct city spellings mapped.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error backfilling {table}: {e}")
+
+    cities = City.query.order_by(City.name).all()
+    print(f"✅ {len(cities)} cities: {', '.join(c.name for c in cities[:20])}"
+          f"{' ...' if len(cities) > 20 else ''}")
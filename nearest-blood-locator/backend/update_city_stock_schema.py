@@ -0,0 +1,13 @@
+from app import app, db
+from models import CityStock  # Import to register with SQLAlchemy
+
+with app.app_context():
+    print("Creating and backfilling city_stock...")
+    try:
+        db.create_all()  # Only creates tables that are missing
+        rows = CityStock.rebuild()
+        db.session.commit()
+        print(f"✅ 'city_stock' is ready ({rows} city/group totals).")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error: {e}")
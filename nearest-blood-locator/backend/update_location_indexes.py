@@ -0,0 +1,20 @@
+from app import app, db
+from sqlalchemy import text
+
+# Composite (latitude, longitude) indexes backing the radius search prefilter
+INDEXES = [
+    "CREATE INDEX ix_donors_lat_lng ON donors (latitude, longitude)",
+    "CREATE INDEX ix_blood_banks_lat_lng ON blood_banks (latitude, longitude)",
+]
+
+with app.app_context():
+    print("Adding location indexes...")
+    with db.engine.connect() as conn:
+        for statement in INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (index might already exist): {e}")
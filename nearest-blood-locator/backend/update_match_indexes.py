@@ -0,0 +1,20 @@
+from app import app, db
+from sqlalchemy import text
+
+# Indexes backing compatibility matching on /api/match/<recipient_id>
+INDEXES = [
+    "CREATE INDEX ix_donors_group_available ON donors (blood_group, availability_status)",
+    "CREATE INDEX ix_blood_stock_group_qty ON blood_stock (blood_group, quantity)",
+]
+
+with app.app_context():
+    print("Adding matching indexes...")
+    with db.engine.connect() as conn:
+        for statement in INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (index might already exist): {e}")
@@ -0,0 +1,23 @@
+from app import app, db
+from sqlalchemy import text
+
+# Indexes backing keyset pagination and filters on GET /api/recipients/
+INDEXES = [
+    "CREATE INDEX ix_recipients_created_id ON recipients (created_at, id)",
+    "CREATE INDEX ix_recipients_group_created_id ON recipients (required_blood_group, created_at, id)",
+    "CREATE INDEX ix_recipients_urgency_created_id ON recipients (urgency_level, created_at, id)",
+    # The city filter uses ix_recipients_city_id_created_id (update_city_schema.py)
+    "DROP INDEX ix_recipients_city_created_id ON recipients",
+]
+
+with app.app_context():
+    print("Adding recipient indexes...")
+    with db.engine.connect() as conn:
+        for statement in INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (index might already exist, or be gone): {e}")
@@ -0,0 +1,62 @@
+# Re-key city_stock and stock_rollups from the free-text city to city_id
+# Run after update_city_schema.py (cities and blood_banks.city_id must exist).
+# The old rollups are kept as stock_rollups_by_name; drop it once checked.
+
+from app import app, db
+from sqlalchemy import text
+from models import CityStock, StockRollup  # Import to register with SQLAlchemy
+from utils.city_index import city_index
+
+with app.app_context():
+    print("Reading rollups keyed by city name...")
+    try:
+        old_rows = db.session.execute(text(
+            "SELECT city, blood_group, bucket_start, units_in, units_out, movements FROM stock_rollups"
+        )).all()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error (rollups might already be keyed by city_id): {e}")
+        old_rows = None
+
+    if old_rows is not None:
+        # Spellings and aliases of one city become one row per hour
+        merged = {}
+        for city, group, bucket, units_in, units_out, movements in old_rows:
+            city_id = city_index.resolve(city)
+            if city_id is None:
+                continue
+            key = (city_id, group, bucket)
+            totals = merged.get(key, (0, 0, 0))
+            merged[key] = (totals[0] + units_in, totals[1] + units_out, totals[2] + movements)
+        db.session.commit()  # cities created while resolving
+
+        with db.engine.connect() as conn:
+            for statement in [
+                "RENAME TABLE stock_rollups TO stock_rollups_by_name",
+                "DROP TABLE city_stock",
+            ]:
+                try:
+                    conn.execute(text(statement))
+                    conn.commit()
+                    print(f"✅ {statement}")
+                except Exception as e:
+                    conn.rollback()
+                    print(f"❌ Error: {e}")
+
+        try:
+            db.create_all()  # Recreates both tables with the city_id keys
+            rows = [
+                {
+                    "city_id": city_id, "blood_group": group, "bucket_start": bucket,
+                    "units_in": units_in, "units_out": units_out, "movements": movements,
+                }
+                for (city_id, group, bucket), (units_in, units_out, movements) in merged.items()
+            ]
+            if rows:
+                db.session.execute(db.insert(StockRollup), rows)
+            totals = CityStock.rebuild()
+            db.session.commit()
+            print(f"✅ {len(old_rows)} rollup rows merged into {len(rows)}; {totals} city/group totals rebuilt.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
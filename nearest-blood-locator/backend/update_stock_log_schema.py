@@ -0,0 +1,10 @@
+from app import app, db
+from models import StockMovement, StockRollup  # Import to register with SQLAlchemy
+
+with app.app_context():
+    print("Creating stock movement log and rollup tables...")
+    try:
+        db.create_all()  # Only creates tables that are missing
+        print("✅ 'stock_movements' and 'stock_rollups' are ready.")
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,49 @@
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    print("Adding unique (blood_bank_id, blood_group) constraint to 'blood_stock'...")
+    with db.engine.connect() as conn:
+        # Collapse each duplicated (bank, group) pair into its newest row,
+        # carrying the units of the others so the bank's stock is unchanged
+        duplicates = conn.execute(text(
+            """
+            SELECT blood_bank_id, blood_group, COUNT(*) AS copies,
+                   SUM(quantity) AS total, MAX(id) AS keep_id
+            FROM blood_stock
+            GROUP BY blood_bank_id, blood_group
+            HAVING COUNT(*) > 1
+            """
+        )).all()
+        removed = 0
+        try:
+            for bank_id, group, copies, total, keep_id in duplicates:
+                conn.execute(
+                    text("UPDATE blood_stock SET quantity = :total WHERE id = :keep_id"),
+                    {"total": total, "keep_id": keep_id}
+                )
+                result = conn.execute(
+                    text(
+                        "DELETE FROM blood_stock WHERE blood_bank_id = :bank_id "
+                        "AND blood_group = :group AND id <> :keep_id"
+                    ),
+                    {"bank_id": bank_id, "group": group, "keep_id": keep_id}
+                )
+                removed += result.rowcount
+                print(f"   bank {bank_id} {group}: {copies} rows merged into id {keep_id} ({total} units)")
+            conn.commit()
+            print(f"✅ Removed {removed} duplicate stock rows; their units were kept.")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error merging duplicates (nothing changed): {e}")
+            raise SystemExit(1)
+        try:
+            conn.execute(text(
+                "ALTER TABLE blood_stock ADD CONSTRAINT uq_blood_stock_bank_group "
+                "UNIQUE (blood_bank_id, blood_group)"
+            ))
+            conn.commit()
+            print("✅ Unique constraint added.")
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error (constraint might already exist): {e}")
@@ -0,0 +1,27 @@
+from app import app, db
+from sqlalchemy import text
+from models import Tombstone  # Import to register with SQLAlchemy
+
+# Range-scan indexes for /api/sync (donors, blood_banks and recipients
+# get theirs from update_updated_at_indexes.py)
+INDEXES = [
+    "CREATE INDEX ix_blood_stock_last_updated ON blood_stock (last_updated)",
+]
+
+with app.app_context():
+    print("Creating tombstones table and sync indexes...")
+    try:
+        db.create_all()  # Only creates tables that are missing
+        print("✅ 'tombstones' is ready.")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+    with db.engine.connect() as conn:
+        for statement in INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (index might already exist): {e}")
@@ -0,0 +1,21 @@
+from app import app, db
+from sqlalchemy import text
+
+# Indexes backing the max(updated_at) watermark used for ETag / 304 responses
+INDEXES = [
+    "CREATE INDEX ix_donors_updated_at ON donors (updated_at)",
+    "CREATE INDEX ix_blood_banks_updated_at ON blood_banks (updated_at)",
+    "CREATE INDEX ix_recipients_updated_at ON recipients (updated_at)",
+]
+
+with app.app_context():
+    print("Adding updated_at indexes...")
+    with db.engine.connect() as conn:
+        for statement in INDEXES:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error (index might already exist): {e}")
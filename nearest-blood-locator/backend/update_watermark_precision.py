@@ -0,0 +1,23 @@
+from app import app, db
+from sqlalchemy import text
+
+# Keep microseconds in the columns behind the ETag watermark (utils/conditional.py);
+# with whole seconds, two writes in the same second produced the same ETag
+STATEMENTS = [
+    "ALTER TABLE donors MODIFY updated_at DATETIME(6) NULL",
+    "ALTER TABLE blood_banks MODIFY updated_at DATETIME(6) NULL",
+    "ALTER TABLE recipients MODIFY updated_at DATETIME(6) NULL",
+    "ALTER TABLE blood_stock MODIFY last_updated DATETIME(6) NULL",
+]
+
+with app.app_context():
+    print("Widening watermark columns to DATETIME(6)...")
+    with db.engine.connect() as conn:
+        for statement in STATEMENTS:
+            try:
+                conn.execute(text(statement))
+                conn.commit()
+                print(f"✅ {statement}")
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ Error: {e}")
@@ -0,0 +1,70 @@
+# Bank Lookup
+# Short-lived user -> blood bank map for the blood-stock endpoints
+
+import threading
+import time
+from collections import namedtuple
+
+from models import BloodBank
+
+# What the stock endpoints need to find a user's bank. Writers lock the
+# bank row by id and take the city from it; a cached city can be stale.
+BankRef = namedtuple("BankRef", ["id", "name", "city"])
+
+_MISSING = object()
+
+class BankLookup:
+    """
+    TTL map from user id to the blood bank they manage
+
+    Every stock call used to start with a query on blood_banks.created_by.
+    Entries (including "no bank") live for `ttl` seconds and are dropped
+    by create/update/delete of the user's bank, so the hot path normally
+    runs no extra query. Invalidation is per process; with several
+    workers, another worker may serve a stale entry until its TTL ends.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # user_id -> (expires_at, BankRef or None)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get("BANK_LOOKUP_TTL_SECONDS", self.ttl)
+
+    def _get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return _MISSING
+        return entry[1]
+
+    def resolve(self, user_id):
+        """
+        Bank managed by user_id
+
+        Returns:
+            BankRef, or None if the user has no bank
+        """
+        ref = self._get(user_id)
+        if ref is not _MISSING:
+            return ref
+
+        row = (
+            BloodBank.query
+            .with_entities(BloodBank.id, BloodBank.name, BloodBank.city)
+            .filter_by(created_by=user_id)
+            .first()
+        )
+        ref = BankRef(*row) if row else None
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (time.monotonic() + self.ttl, ref)
+        return ref
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+bank_lookup = BankLookup()
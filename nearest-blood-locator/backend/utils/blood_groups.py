@@ -0,0 +1,68 @@
+# Blood Group Helpers
+# Compact bitmask encoding for sets of ABO/Rh blood groups
+
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+
+# One bit per group, in BLOOD_GROUPS order
+GROUP_BITS = {group: 1 << i for i, group in enumerate(BLOOD_GROUPS)}
+
+def normalize_group(group):
+    """Return the canonical spelling of a blood group, or None if unknown"""
+    group = (group or "").strip().upper()
+    return group if group in GROUP_BITS else None
+
+def groups_to_mask(groups):
+    """
+    Encode blood groups as an 8-bit mask
+
+    Args:
+        groups: List of groups, or a comma-joined string ("A+,O-")
+
+    Returns:
+        Integer mask; unknown groups are ignored
+    """
+    if isinstance(groups, str):
+        groups = groups.split(",")
+    mask = 0
+    for group in groups or []:
+        group = normalize_group(group)
+        if group:
+            mask |= GROUP_BITS[group]
+    return mask
+
+def mask_to_groups(mask):
+    """Decode a mask back into a list of groups in canonical order"""
+    mask = mask or 0
+    return [group for group in BLOOD_GROUPS if mask & GROUP_BITS[group]]
+
+# Every possible mask decoded once, for serializing many rows
+MASK_GROUPS = tuple(tuple(mask_to_groups(mask)) for mask in range(1 << len(BLOOD_GROUPS)))
+
+def _antigens(group):
+    abo, rh = group[:-1], group[-1]
+    antigens = set() if abo == "O" else set(abo)
+    if rh == "+":
+        antigens.add("D")
+    return antigens
+
+def _build_compatibility():
+    # A donor's red cells are compatible when they carry no antigen the
+    # recipient lacks (ABO and RhD only)
+    matrix = {}
+    for recipient in BLOOD_GROUPS:
+        recipient_antigens = _antigens(recipient)
+        matrix[recipient] = groups_to_mask([
+            donor for donor in BLOOD_GROUPS
+            if _antigens(donor) <= recipient_antigens
+        ])
+    return matrix
+
+# Recipient group -> mask of donor groups it can receive (8x8 table)
+COMPATIBLE_DONOR_MASKS = _build_compatibility()
+
+def compatible_donor_groups(recipient_group):
+    """List the donor groups a recipient can safely receive"""
+    group = normalize_group(recipient_group)
+    if not group:
+        return []
+    return mask_to_groups(COMPATIBLE_DONOR_MASKS[group])
@@ -0,0 +1,224 @@
+# Response Cache
+# Read-through cache for public search endpoints with write invalidation
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, Response
+
+class MemoryBackend:
+    """
+    In-process LRU cache with per-entry TTL
+
+    Each worker process gets its own copy; use RedisBackend to share
+    entries and invalidations between gunicorn workers.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def generation(self, namespace):
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            # Entries under the old generation can never be read again
+            prefix = f"{namespace}:"
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+
+    def size(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisBackend:
+    """
+    Cache shared through Redis (or any server speaking its protocol)
+
+    TTL is enforced with SET EX; LRU eviction is left to the server's
+    maxmemory-policy (configure allkeys-lru). Namespace generations live
+    in Redis too, so an invalidation in one worker is seen by all.
+    """
+
+    name = "redis"
+
+    def __init__(self, url, key_prefix="blood-locator:cache:"):
+        import redis  # optional dependency, only needed for this backend
+        self._client = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self.evictions = 0
+
+    def get(self, key):
+        raw = self._client.get(self.key_prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.set(self.key_prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def generation(self, namespace):
+        raw = self._client.get(f"{self.key_prefix}gen:{namespace}")
+        return int(raw) if raw else 0
+
+    def bump_generation(self, namespace):
+        # Old keys are unreachable after the bump and expire via their TTL
+        self._client.incr(f"{self.key_prefix}gen:{namespace}")
+
+    def size(self):
+        return None
+
+    def clear(self):
+        for key in self._client.scan_iter(match=self.key_prefix + "*"):
+            self._client.delete(key)
+
+class ResponseCache:
+    """
+    Caches JSON responses of GET views keyed on normalized query params
+
+    Views are grouped into namespaces ("donors", "bloodbanks"); writes
+    call invalidate(namespace), which bumps that namespace's generation
+    so only its entries go stale.
+    """
+
+    # Besides X-* headers, the validators from utils.conditional
+    STORED_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Vary")
+
+    def __init__(self, backend=None, default_ttl=30):
+        self.backend = backend or MemoryBackend()
+        self.default_ttl = default_ttl
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config
+        self.enabled = config.get("CACHE_ENABLED", True)
+        self.default_ttl = config.get("CACHE_TTL_SECONDS", self.default_ttl)
+        if config.get("CACHE_BACKEND", "memory") == "redis":
+            self.backend = RedisBackend(config["CACHE_REDIS_URL"])
+        else:
+            self.backend = MemoryBackend(config.get("CACHE_MAX_ENTRIES", 1024))
+
+    # Filters the views compare case-insensitively; every other value
+    # (fields=, cursor=, ...) is kept exactly as sent
+    CASE_INSENSITIVE_ARGS = frozenset({"bloodGroup", "location", "city"})
+
+    # Request headers that change the body for the same query string
+    KEY_HEADERS = ("Accept", "X-Serializer")
+
+    @classmethod
+    def normalize_args(cls, args):
+        """Sorted, stripped query string used in cache keys"""
+        items = sorted(
+            (key, value.strip().casefold() if key in cls.CASE_INSENSITIVE_ARGS else value.strip())
+            for key, values in args.lists()
+            for value in values
+            if value.strip()
+        )
+        return "&".join(f"{key}={value}" for key, value in items)
+
+    def _key(self, namespace):
+        generation = self.backend.generation(namespace)
+        headers = "|".join(request.headers.get(name, "").strip().lower() for name in self.KEY_HEADERS)
+        return f"{namespace}:{generation}:{request.path}?{self.normalize_args(request.args)}#{headers}"
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def cached(self, namespace, ttl=None, bypass=None):
+        """
+        Decorator for GET views returning (json_response, status)
+
+        bypass, if given, is called per request; when it returns True the
+        view runs uncached (e.g. for streamed representations).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled or (bypass is not None and bypass()):
+                    return view(*args, **kwargs)
+
+                key = self._key(namespace)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count(hit=True)
+                    response = Response(entry["body"], status=entry["status"], mimetype="application/json")
+                    response.headers.update(entry["headers"])
+                    response.headers["X-Cache"] = "HIT"
+                    # Stored validators still answer If-None-Match with a 304
+                    return response.make_conditional(request)
+
+                self._count(hit=False)
+                result = view(*args, **kwargs)
+                response, status = result if isinstance(result, tuple) else (result, None)
+                if status is not None:
+                    response.status_code = status
+                if response.status_code == 200 and not response.is_streamed:
+                    self.backend.set(key, {
+                        "body": response.get_data(as_text=True),
+                        "status": 200,
+                        "headers": {
+                            name: value for name, value in response.headers.items()
+                            if name.startswith("X-") or name in self.STORED_HEADERS
+                        },
+                    }, ttl or self.default_ttl)
+                response.headers["X-Cache"] = "MISS"
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.bump_generation(namespace)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.backend.evictions,
+            "entries": self.backend.size(),
+        }
+
+response_cache = ResponseCache()
@@ -0,0 +1,205 @@
+# City Index
+# In-memory sorted name array for city autocomplete and city_id lookups
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import City, CityAlias
+from models.city import display_city, normalize_city
+from utils.sql_helpers import upsert
+
+class CityIndex:
+    """
+    Sorted array of normalized city names and aliases
+
+    Prefix search is a bisect to the first key >= the prefix followed by
+    a scan while keys still start with it, so autocomplete and city
+    filters normally never touch the database. Like ModelSpatialIndex,
+    the array is loaded lazily and rebuilt after max_age_seconds. Cities
+    this process creates are added as soon as their transaction commits;
+    ones created by other workers in the meantime are still found by
+    find() and resolve(), which fall back to the tables on a miss.
+    """
+
+    # session.info key for cities created in a transaction not yet committed
+    PENDING_KEY = "city_index.pending"
+
+    def __init__(self, max_age_seconds=300):
+        self.max_age_seconds = max_age_seconds
+        self._keys = []      # sorted normalized names and aliases
+        self._ids = []       # city id for each entry of _keys
+        self._by_key = {}    # normalized name or alias -> city id
+        self._names = {}     # city id -> canonical name
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age_seconds = app.config.get("CITY_INDEX_MAX_AGE_SECONDS", self.max_age_seconds)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def _after_commit(self, session):
+        for city_id, name, key in session.info.pop(self.PENDING_KEY, ()):
+            self.add(city_id, name, key)
+
+    def _after_rollback(self, session):
+        session.info.pop(self.PENDING_KEY, None)
+
+    def _is_current(self):
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.max_age_seconds
+
+    def ensure_loaded(self):
+        if self._is_current():
+            return
+        with self._lock:
+            if self._is_current():
+                return  # another thread reloaded while we waited
+            cities = db.session.execute(select(City.id, City.name, City.name_key)).all()
+            aliases = db.session.execute(select(CityAlias.alias_key, CityAlias.city_id)).all()
+            self.bulk_load(cities, aliases)
+            self._loaded_at = time.monotonic()
+
+    def bulk_load(self, cities, aliases=()):
+        """
+        Replace the contents of the index
+
+        Args:
+            cities: Iterable of (id, name, name_key)
+            aliases: Iterable of (alias_key, city_id)
+        """
+        names = {city_id: name for city_id, name, _ in cities}
+        by_key = {key: city_id for city_id, _, key in cities}
+        for key, city_id in aliases:
+            # A canonical name wins over an alias spelled the same way
+            if city_id in names:
+                by_key.setdefault(key, city_id)
+        entries = sorted(by_key.items())
+        # Readers use whichever complete set of lists they picked up
+        self._keys = [key for key, _ in entries]
+        self._ids = [city_id for _, city_id in entries]
+        self._by_key = by_key
+        self._names = names
+
+    def add(self, city_id, name, key):
+        """Insert one committed city into the loaded array"""
+        with self._lock:
+            if self._loaded_at is None or key in self._by_key:
+                return  # the next load reads it from the table
+            position = bisect.bisect_left(self._keys, key)
+            keys = self._keys[:position] + [key] + self._keys[position:]
+            ids = self._ids[:position] + [city_id] + self._ids[position:]
+            by_key = dict(self._by_key)
+            by_key[key] = city_id
+            names = dict(self._names)
+            names[city_id] = name
+            self._keys, self._ids, self._by_key, self._names = keys, ids, by_key, names
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def lookup(self, name):
+        """City id for an exact name or alias, or None"""
+        self.ensure_loaded()
+        return self._by_key.get(normalize_city(name))
+
+    def prefix(self, text, limit=10):
+        """
+        Cities whose name or an alias starts with text
+
+        Returns:
+            List of (city_id, canonical name), in key order, one per city
+        """
+        self.ensure_loaded()
+        key = normalize_city(text)
+        if not key:
+            return []
+        keys, ids, names = self._keys, self._ids, self._names
+        results = []
+        seen = set()
+        position = bisect.bisect_left(keys, key)
+        while position < len(keys) and keys[position].startswith(key) and len(results) < limit:
+            city_id = ids[position]
+            if city_id not in seen:
+                seen.add(city_id)
+                results.append((city_id, names[city_id]))
+            position += 1
+        return results
+
+    def name_of(self, city_id):
+        """Canonical name of a city, reading the table for one not loaded yet"""
+        self.ensure_loaded()
+        name = self._names.get(city_id)
+        if name is None:
+            name = db.session.execute(select(City.name).where(City.id == city_id)).scalar()
+        return name
+
+    def find(self, name):
+        """City id for an exact name or alias, checking the tables on a miss"""
+        city_id = self.lookup(name)
+        if city_id is not None:
+            return city_id
+        key = normalize_city(name)
+        if not key:
+            return None
+        city_id = db.session.execute(
+            select(City.id).where(City.name_key == key)
+        ).scalar()
+        if city_id is None:
+            city_id = db.session.execute(
+                select(CityAlias.city_id).where(CityAlias.alias_key == key)
+            ).scalar()
+        return city_id
+
+    def search_ids(self, text, limit=50):
+        """
+        City ids a search box term refers to
+
+        An exact name or alias means that one city; otherwise every city
+        the term is a prefix of, so "hyd" still finds Hyderabad.
+        """
+        city_id = self.lookup(text)
+        if city_id is not None:
+            return [city_id]
+        city_ids = [city_id for city_id, _ in self.prefix(text, limit)]
+        if not city_ids:
+            city_id = self.find(text)
+            if city_id is not None:
+                city_ids = [city_id]
+        return city_ids
+
+    def resolve(self, name):
+        """
+        City id for a free-text city being saved, creating the city if new
+
+        Runs in the caller's transaction, so call it before adding rows
+        whose unique keys should fail at commit (see register). Creating
+        is a no-op-on-conflict insert, so concurrent first uses of a city
+        agree on one row. A new city joins the array when the transaction
+        commits, so prefix search and autocomplete see it right away; a
+        rollback discards it.
+
+        Returns:
+            City id, or None for a blank name
+        """
+        city_id = self.find(name)
+        if city_id is not None:
+            return city_id
+        key = normalize_city(name)
+        if not key:
+            return None
+        db.session.execute(upsert(
+            City, [{"name": display_city(key), "name_key": key}], ["name_key"],
+            lambda new: {"name_key": new.name_key}
+        ))
+        # The stored name, which a concurrent creator may have spelled first
+        row = db.session.execute(select(City.id, City.name).where(City.name_key == key)).one()
+        db.session.info.setdefault(self.PENDING_KEY, []).append((row.id, row.name, key))
+        return row.id
+
+city_index = CityIndex()
@@ -0,0 +1,65 @@
+# Conditional GET
+# ETag / Last-Modified validators from an updated_at watermark
+
+import hashlib
+
+from flask import request, Response
+from sqlalchemy import func
+from werkzeug.http import is_resource_modified
+
+class Watermark:
+    """
+    Validators for a filtered list, from one aggregate query
+
+    max(updated_at) moves when a row is inserted or updated: every write
+    stamps the current time and the columns keep microseconds (see
+    utils.sql_helpers.precise_datetime), so it is the newest value even
+    when the row was not the newest before. The row count and sum of ids
+    move when rows are deleted or leave the filter. The ETag also covers
+    the path, query string and Accept header, since those change the body
+    for the same rows.
+
+    Last-Modified has one-second resolution and cannot see deletes;
+    clients should prefer If-None-Match, which browsers send
+    automatically once they have an ETag.
+    """
+
+    def __init__(self, last_modified, count, id_sum=0, private=False):
+        self.last_modified = last_modified
+        self.count = count
+        self.id_sum = id_sum
+        self.private = private
+        stamp = last_modified.isoformat() if last_modified else "-"
+        variant = f"{request.full_path}|{request.headers.get('Accept', '')}|{stamp}|{count}|{id_sum}"
+        self.etag = hashlib.sha1(variant.encode()).hexdigest()[:24]
+
+    @classmethod
+    def of(cls, query, column, private=False):
+        """
+        Args:
+            query: Filtered ORM query for the list (no ordering or limit)
+            column: The model's updated_at column
+            private: True for per-user responses (kept out of shared caches)
+        """
+        last_modified, count, id_sum = query.with_entities(
+            func.max(column), func.count(), func.coalesce(func.sum(column.class_.id), 0)
+        ).one()
+        return cls(last_modified, count, id_sum, private)
+
+    def is_fresh(self):
+        """True when the client's If-None-Match / If-Modified-Since still holds"""
+        return not is_resource_modified(
+            request.environ, etag=self.etag, last_modified=self.last_modified
+        )
+
+    def apply(self, response):
+        response.set_etag(self.etag, weak=True)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        # Let browsers keep the body but revalidate on every load
+        response.headers["Cache-Control"] = "private, no-cache" if self.private else "no-cache"
+        response.vary.add("Accept")
+        return response
+
+    def not_modified(self):
+        return self.apply(Response(status=304))
@@ -0,0 +1,142 @@
+# Connection Pool Monitoring
+# Pool statistics for /api/metrics and an idle-only liveness check
+
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+class PoolMonitor:
+    """
+    Counters shared by every MonitoredQueuePool in the process
+
+    Wait time is measured around QueuePool._do_get, so it covers both
+    queueing for a free connection and opening an overflow one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.liveness_checks = 0
+        self.liveness_failures = 0
+        self.invalidations = 0
+        self._pools = []
+
+    def count_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def observe_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def init_app(self, app, db, metrics=None):
+        """
+        Attach liveness and invalidation listeners to the app's engines
+
+        DB_POOL_IDLE_PING_SECONDS > 0 enables the idle-only liveness check.
+        Pass the RequestMetrics instance to publish stats on /api/metrics.
+        """
+        idle_ping = app.config.get("DB_POOL_IDLE_PING_SECONDS", 0)
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            self._pools.append(engine.pool)
+            event.listen(engine, "invalidate", self._on_invalidate)
+            if idle_ping:
+                event.listen(engine, "checkin", _on_checkin)
+                event.listen(engine, "checkout", self._liveness_check(idle_ping))
+        if metrics is not None:
+            metrics.add_collector(self.render)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _liveness_check(self, idle_seconds):
+        # Replaces pool_pre_ping: only connections that sat idle long
+        # enough to have been dropped (MySQL wait_timeout, a proxy, a
+        # failover) pay for a round trip. Connections in steady use skip it.
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            checked_in_at = connection_record.info.get("checked_in_at")
+            if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+                return
+            with self._lock:
+                self.liveness_checks += 1
+            try:
+                cursor = dbapi_connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception:
+                with self._lock:
+                    self.liveness_failures += 1
+                # The pool discards this connection and retries with a new one
+                raise exc.DisconnectionError()
+        return on_checkout
+
+    def stats(self):
+        gauges = {"size": 0, "checkedIn": 0, "checkedOut": 0, "overflow": 0}
+        for pool in self._pools:
+            if isinstance(pool, QueuePool):
+                gauges["size"] += pool.size()
+                gauges["checkedIn"] += pool.checkedin()
+                gauges["checkedOut"] += pool.checkedout()
+                gauges["overflow"] += max(0, pool.overflow())
+        with self._lock:
+            gauges.update({
+                "checkouts": self.checkouts,
+                "waitSeconds": self.wait_seconds,
+                "maxWaitSeconds": self.max_wait_seconds,
+                "timeouts": self.timeouts,
+                "livenessChecks": self.liveness_checks,
+                "livenessFailures": self.liveness_failures,
+                "invalidations": self.invalidations,
+            })
+        return gauges
+
+    def render(self):
+        """Prometheus text lines for RequestMetrics.add_collector"""
+        stats = self.stats()
+        metrics = [
+            ("db_pool_size", "gauge", "Configured pool size", stats["size"]),
+            ("db_pool_checked_in", "gauge", "Idle connections in the pool", stats["checkedIn"]),
+            ("db_pool_checked_out", "gauge", "Connections currently in use", stats["checkedOut"]),
+            ("db_pool_overflow", "gauge", "Connections open beyond pool_size", stats["overflow"]),
+            ("db_pool_checkouts_total", "counter", "Connection checkouts", stats["checkouts"]),
+            ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection", stats["waitSeconds"]),
+            ("db_pool_max_wait_seconds", "gauge", "Longest single checkout wait", stats["maxWaitSeconds"]),
+            ("db_pool_timeouts_total", "counter", "Checkouts that hit pool_timeout", stats["timeouts"]),
+            ("db_pool_liveness_checks_total", "counter", "Idle connections pinged on checkout", stats["livenessChecks"]),
+            ("db_pool_liveness_failures_total", "counter", "Idle connections found dead on checkout", stats["livenessFailures"]),
+            ("db_pool_invalidations_total", "counter", "Connections invalidated", stats["invalidations"]),
+        ]
+        lines = []
+        for name, kind, help_text, value in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {value:.6f}" if isinstance(value, float) else f"{name} {value}")
+        return lines
+
+pool_monitor = PoolMonitor()
+
+class MonitoredQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time to pool_monitor"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_monitor.count_timeout()
+            raise
+        finally:
+            pool_monitor.observe_wait(time.perf_counter() - start)
+
+def _on_checkin(dbapi_connection, connection_record):
+    connection_record.info["checked_in_at"] = time.monotonic()
@@ -0,0 +1,183 @@
+# Event Broker
+# Fan-out of recipient and stock changes to Server-Sent Events subscribers
+
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from utils.logging_setup import get_logger
+
+logger = get_logger("events")
+
+class Subscription:
+    """One connected client with its server-side filters"""
+
+    def __init__(self, blood_groups=None, city_ids=None, types=None, max_pending=100):
+        self.blood_groups = blood_groups or set()
+        # None means any city; an empty set (only unknown names asked
+        # for) matches nothing
+        self.city_ids = city_ids
+        self.types = types or set()
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def matches(self, event):
+        if self.types and event["type"].split(".")[0] not in self.types:
+            return False
+        if self.blood_groups and event.get("bloodGroup") not in self.blood_groups:
+            return False
+        if self.city_ids is not None and event.get("cityId") not in self.city_ids:
+            return False
+        return True
+
+    def offer(self, event):
+        # A slow client loses its oldest pending event rather than
+        # blocking the publisher or growing without bound
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+class EventBroker:
+    """
+    In-process publish/subscribe hub
+
+    With a Redis URL configured, publish() goes through a Redis channel
+    and every worker's listener thread dispatches to its own local
+    subscribers, so a write in one worker reaches clients on all of them.
+    """
+
+    CHANNEL = "blood-locator:events"
+
+    # Seconds between resubscribe attempts after the Redis connection drops
+    RETRY_MIN_SECONDS = 1
+    RETRY_MAX_SECONDS = 30
+
+    def __init__(self, history=256):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._seq = itertools.count(1)
+        self._redis = None
+
+    def init_app(self, app):
+        url = app.config.get("EVENTS_REDIS_URL")
+        if url:
+            import redis  # optional dependency, only needed for multi-worker fan-out
+            self._redis = redis.Redis.from_url(url)
+            listener = threading.Thread(target=self._listen, daemon=True)
+            listener.start()
+
+    def _listen(self):
+        # Runs for the life of the worker: a dropped connection is retried
+        # with backoff, and one bad message is skipped, so cross-worker
+        # delivery never stops silently
+        delay = self.RETRY_MIN_SECONDS
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                delay = self.RETRY_MIN_SECONDS
+                for message in pubsub.listen():
+                    self._receive(message)
+            except Exception:
+                logger.exception("event listener lost Redis; resubscribing in %ss", delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.RETRY_MAX_SECONDS)
+
+    def _receive(self, message):
+        try:
+            event = json.loads(message["data"])
+            if not isinstance(event, dict) or "id" not in event or "type" not in event:
+                raise ValueError("not an event")
+        except (KeyError, TypeError, ValueError):
+            logger.warning("skipping malformed event message: %r", message.get("data"))
+            return
+        self._dispatch(event)
+
+    def subscribe(self, **filters):
+        subscription = Subscription(**filters)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def replay_since(self, last_event_id, subscription):
+        """Events after last_event_id still held in history, for reconnects"""
+        try:
+            last = tuple(int(part) for part in last_event_id.split("-"))
+        except (AttributeError, ValueError):
+            return []
+        with self._lock:
+            history = list(self._history)
+        return [
+            event for event in history
+            if tuple(int(part) for part in event["id"].split("-")) > last
+            and subscription.matches(event)
+        ]
+
+    def publish(self, event_type, payload, blood_group=None, city=None, city_id=None):
+        """
+        Send an event to every matching subscriber
+
+        Call after the transaction has committed, so clients never see a
+        change that was rolled back.
+        """
+        event = {
+            "id": f"{int(time.time() * 1000)}-{next(self._seq)}",
+            "type": event_type,
+            "bloodGroup": blood_group,
+            "city": city,
+            "cityId": city_id,
+            "data": payload,
+        }
+        if self._redis is not None:
+            try:
+                self._redis.publish(self.CHANNEL, json.dumps(event))
+                return
+            except Exception:
+                pass  # fall back to local delivery if Redis is unreachable
+        self._dispatch(event)
+
+    def _dispatch(self, event):
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.matches(event):
+                subscription.offer(event)
+
+def format_sse(event):
+    """Serialize an event in text/event-stream framing"""
+    body = json.dumps({
+        "type": event["type"],
+        "bloodGroup": event["bloodGroup"],
+        "city": event["city"],
+        "cityId": event.get("cityId"),
+        "data": event["data"],
+    })
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {body}\n\n"
+
+event_broker = EventBroker()
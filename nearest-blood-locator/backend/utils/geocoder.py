@@ -0,0 +1,266 @@
+# Offline Geocoder
+# City <-> coordinates from a compiled gazetteer (see build_gazetteer.py)
+
+import json
+import math
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from models.city import normalize_city
+from utils.location_helper import haversine_distances
+
+KM_PER_DEGREE = 111.2
+
+class Place(namedtuple("Place", ["name", "country", "latitude", "longitude", "population", "distance_km"])):
+    """One gazetteer entry; distance_km is set by reverse lookups only"""
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            "city": self.name,
+            "country": self.country,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "population": self.population,
+            "distanceKm": self.distance_km,
+        }
+
+# Arrays written by build_gazetteer.py, one .npy file each
+ARRAYS = [
+    "lat", "lon", "cell", "population", "country",
+    "name_offsets", "names",
+    "key_offsets", "keys", "key_place",
+]
+
+class GeocoderUnavailable(Exception):
+    """No gazetteer is loaded (GEO_GAZETTEER_PATH unset or unreadable)"""
+
+class Gazetteer:
+    """
+    Read-only place index memory-mapped from a gazetteer directory
+
+    Places are stored sorted by grid cell, so a cell's places are one
+    contiguous slice found with searchsorted. Reverse lookups scan rings
+    of cells around the point until no unvisited cell can hold anything
+    closer. Forward lookups binary-search a sorted array of normalized
+    names and alternate names.
+
+    Every array is opened with mmap_mode="r": loading costs a few page
+    mappings rather than parsing the file, and workers forked from the
+    same files share the pages.
+    """
+
+    def __init__(self):
+        self._arrays = None
+        self.cell_size_deg = None
+        self._columns = None
+        self.max_distance_km = 50.0
+
+    def init_app(self, app):
+        self.max_distance_km = app.config.get("GEO_REVERSE_MAX_KM", self.max_distance_km)
+        path = app.config.get("GEO_GAZETTEER_PATH")
+        if not path or not os.path.isdir(path):
+            return  # not built; /api/geo answers 503
+        try:
+            self.load(path)
+        except (OSError, ValueError) as e:
+            app.logger.warning("Gazetteer not loaded from %s: %s", path, e)
+
+    def load(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ARRAYS
+        }
+        self.cell_size_deg = float(meta["cellSizeDeg"])
+        self._columns = int(math.ceil(360 / self.cell_size_deg))
+        self._arrays = arrays
+
+    @property
+    def loaded(self):
+        return self._arrays is not None
+
+    def __len__(self):
+        return len(self._arrays["lat"]) if self.loaded else 0
+
+    def _require(self):
+        if self._arrays is None:
+            raise GeocoderUnavailable("Gazetteer is not loaded")
+        return self._arrays
+
+    def _cell(self, row, column):
+        return row * self._columns + column % self._columns
+
+    def _row_column(self, lat, lon):
+        return (
+            int(math.floor((lat + 90) / self.cell_size_deg)),
+            int(math.floor((lon + 180) / self.cell_size_deg)),
+        )
+
+    def _place(self, index, distance_km=None):
+        arrays = self._arrays
+        offsets = arrays["name_offsets"]
+        name = bytes(arrays["names"][offsets[index]:offsets[index + 1]]).decode("utf-8")
+        return Place(
+            name=name,
+            country=arrays["country"][index].decode("ascii"),
+            # Stored as float32; drop the digits that adds
+            latitude=round(float(arrays["lat"][index]), 5),
+            longitude=round(float(arrays["lon"][index]), 5),
+            population=int(arrays["population"][index]),
+            distance_km=None if distance_km is None else round(float(distance_km), 2),
+        )
+
+    def _ring(self, row, column, ring):
+        """Cell ids on the square ring `ring` cells away from (row, column)"""
+        if ring == 0:
+            return [self._cell(row, column)]
+        cells = []
+        for r in range(row - ring, row + ring + 1):
+            if r < 0 or r * self.cell_size_deg >= 180:
+                continue
+            if abs(r - row) == ring:
+                columns = range(column - ring, column + ring + 1)
+            else:
+                columns = (column - ring, column + ring)
+            cells.extend(self._cell(r, c) for c in columns)
+        return cells
+
+    def _ring_min_km(self, lat, ring):
+        # Nothing in ring r is closer than r - 1 whole cells. Cells narrow
+        # toward the poles, so measure with the smallest column width the
+        # ring can reach.
+        if ring <= 1:
+            return 0.0
+        max_lat = min(90.0, abs(lat) + ring * self.cell_size_deg)
+        return (ring - 1) * self.cell_size_deg * KM_PER_DEGREE * max(math.cos(math.radians(max_lat)), 0.01)
+
+    def reverse(self, lat, lon, max_distance_km=None):
+        """
+        Nearest gazetteer place to a point
+
+        Args:
+            lat, lon: Point to resolve
+            max_distance_km: Give up beyond this distance (default
+                GEO_REVERSE_MAX_KM)
+
+        Returns:
+            Place, or None if nothing is within max_distance_km
+
+        Raises:
+            GeocoderUnavailable: If no gazetteer is loaded
+        """
+        arrays = self._require()
+        max_distance_km = self.max_distance_km if max_distance_km is None else max_distance_km
+        cells = arrays["cell"]
+        row, column = self._row_column(lat, lon)
+
+        # best_distance starts at the cutoff, so the ring bound also stops
+        # the search when nothing is found
+        best_index, best_distance = None, max_distance_km
+        for ring in range(self._columns // 2 + 1):
+            if self._ring_min_km(lat, ring) > best_distance:
+                break
+            ids = np.asarray(self._ring(row, column, ring), dtype=cells.dtype)
+            starts = np.searchsorted(cells, ids, side="left")
+            ends = np.searchsorted(cells, ids, side="right")
+            occupied = starts < ends
+            if not occupied.any():
+                continue
+            # All of the ring's places in one distance pass
+            candidates = np.concatenate([
+                np.arange(start, end) for start, end in zip(starts[occupied], ends[occupied])
+            ])
+            distances = haversine_distances(lat, lon, arrays["lat"][candidates], arrays["lon"][candidates])
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= best_distance:
+                best_index, best_distance = int(candidates[nearest]), distances[nearest]
+        if best_index is None:
+            return None
+        return self._place(best_index, best_distance)
+
+    def _key(self, position):
+        arrays = self._arrays
+        offsets = arrays["key_offsets"]
+        return bytes(arrays["keys"][offsets[position]:offsets[position + 1]]).decode("utf-8")
+
+    def _key_range(self, key):
+        """[lo, hi) of the sorted key array equal to key"""
+        count = len(self._arrays["key_place"])
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        end = lo
+        while end < count and self._key(end) == key:
+            end += 1
+        return lo, end
+
+    def forward(self, name, country=None):
+        """
+        Best gazetteer place for a city name
+
+        Matches the name or any alternate name case-insensitively; among
+        several places of that name the most populous wins.
+
+        Args:
+            name: City name as typed
+            country: Optional ISO country code to restrict matches
+
+        Returns:
+            Place, or None if the name is unknown
+
+        Raises:
+            GeocoderUnavailable: If no gazetteer is loaded
+        """
+        arrays = self._require()
+        key = normalize_city(name)
+        if not key:
+            return None
+        lo, hi = self._key_range(key)
+        if lo == hi:
+            return None
+        candidates = np.unique(arrays["key_place"][lo:hi])
+        if country:
+            code = country.strip().upper().encode("ascii", "ignore")
+            candidates = candidates[arrays["country"][candidates] == code]
+            if not len(candidates):
+                return None
+        best = candidates[int(np.argmax(arrays["population"][candidates]))]
+        return self._place(int(best))
+
+    def fill_location(self, city, latitude, longitude, country=None):
+        """
+        Complete a submitted location from the gazetteer
+
+        A known city is rewritten to its gazetteer spelling and, if no
+        coordinates came with it, gets the city's. Coordinates without a
+        city get the nearest place's name. Anything the gazetteer cannot
+        place, or any input when none is loaded, is returned unchanged.
+
+        Returns:
+            (city, latitude, longitude)
+        """
+        if not self.loaded:
+            return city, latitude, longitude
+        has_point = latitude is not None and longitude is not None
+        if city:
+            place = self.forward(city, country)
+            if place is None:
+                return city, latitude, longitude
+            if has_point:
+                return place.name, latitude, longitude
+            return place.name, place.latitude, place.longitude
+        if has_point:
+            place = self.reverse(latitude, longitude)
+            if place is not None:
+                return place.name, latitude, longitude
+        return city, latitude, longitude
+
+gazetteer = Gazetteer()
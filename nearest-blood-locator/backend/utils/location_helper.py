@@ -3,6 +3,11 @@
 
 import math
 
+import numpy as np
+from sqlalchemy import or_
+
+EARTH_RADIUS_KM = 6371
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """
     Calculate distance between two coordinates using Haversine formula
@@ -16,7 +21,7 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     Returns:
         Distance in kilometers
     """
-    R = 6371  # Earth's radius in kilometers
+    R = EARTH_RADIUS_KM  # Earth's radius in kilometers
     
     # Convert to radians
     lat1_rad = math.radians(lat1)
@@ -34,46 +39,328 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     
     return round(distance, 1)
 
-def sort_by_distance(items):
+def haversine_distances(origin_lat, origin_lon, lats, lons):
+    """
+    Calculate distances from one origin to many coordinates in a single pass
+
+    Args:
+        origin_lat: Latitude of the origin
+        origin_lon: Longitude of the origin
+        lats: Sequence or array of latitudes
+        lons: Sequence or array of longitudes
+
+    Returns:
+        NumPy float array of unrounded distances in kilometers.
+        Entries with a missing (None/NaN) coordinate come back as NaN.
+    """
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lon_rad = np.radians(np.asarray(lons, dtype=np.float64))
+    origin_lat_rad = math.radians(origin_lat)
+    origin_lon_rad = math.radians(origin_lon)
+
+    a = (
+        np.sin((lat_rad - origin_lat_rad) / 2) ** 2
+        + math.cos(origin_lat_rad) * np.cos(lat_rad) * np.sin((lon_rad - origin_lon_rad) / 2) ** 2
+    )
+    # Clip guards against float drift pushing a just above 1.0 for antipodal points
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def nearest_k(origin_lat, origin_lon, lats, lons, k, max_distance_km=None):
+    """
+    Select the k closest coordinates to an origin
+
+    Args:
+        origin_lat: Latitude of the origin
+        origin_lon: Longitude of the origin
+        lats: Sequence or array of latitudes
+        lons: Sequence or array of longitudes
+        k: Number of results to return
+        max_distance_km: Optional radius; farther points are dropped
+
+    Returns:
+        Tuple of (indices, distances) as NumPy arrays, closest first.
+        Indices refer to positions in the input arrays.
+    """
+    distances = haversine_distances(origin_lat, origin_lon, lats, lons)
+    return top_k(distances, k, max_distance_km)
+
+def top_k(distances, k, max_distance_km=None):
+    """
+    Pick the k smallest entries of a distance array
+
+    Uses argpartition so only the k survivors are fully sorted.
+
+    Args:
+        distances: NumPy array from haversine_distances
+        k: Number of results to return
+        max_distance_km: Optional radius; farther points are dropped
+
+    Returns:
+        Tuple of (indices, distances) as NumPy arrays, closest first
+    """
+    valid = ~np.isnan(distances)
+    if max_distance_km is not None:
+        valid &= distances <= max_distance_km
+    candidates = np.flatnonzero(valid)
+
+    if k is not None and k < len(candidates):
+        if k <= 0:
+            candidates = candidates[:0]
+        else:
+            part = np.argpartition(distances[candidates], k - 1)[:k]
+            candidates = candidates[part]
+
+    order = candidates[np.argsort(distances[candidates], kind="stable")]
+    return order, distances[order]
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Smallest lat/lon box that contains a circle on the sphere
+
+    Args:
+        lat: Latitude of the center
+        lon: Longitude of the center
+        radius_km: Circle radius in kilometers
+
+    Returns:
+        Tuple (min_lat, max_lat, min_lon, max_lon). When the box crosses
+        the antimeridian, min_lon is greater than max_lon.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    min_lat = lat - dlat
+    max_lat = lat + dlat
+
+    # Box touches a pole: every longitude is in range
+    if min_lat <= -90 or max_lat >= 90 or angular >= math.pi / 2:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+
+    dlon = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+    min_lon = lon - dlon
+    max_lon = lon + dlon
+    if max_lon - min_lon >= 360:
+        return min_lat, max_lat, -180.0, 180.0
+    if min_lon < -180:
+        min_lon += 360
+    if max_lon > 180:
+        max_lon -= 360
+    return min_lat, max_lat, min_lon, max_lon
+
+def radius_search(query, model, lat, lon, radius_km):
+    """
+    Run a radius search with a bounding-box prefilter in SQL
+
+    The box predicate on (latitude, longitude) lets the database use its
+    index; exact Haversine then runs only on the rows that survive.
+
+    Args:
+        query: SQLAlchemy query over model (other filters already applied)
+        model: Model class with latitude/longitude columns
+        lat: Latitude of the search origin
+        lon: Longitude of the search origin
+        radius_km: Search radius in kilometers
+
+    Returns:
+        List of (row, distance_km) tuples, closest first
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    query = query.filter(model.latitude.between(min_lat, max_lat))
+    if min_lon <= max_lon:
+        query = query.filter(model.longitude.between(min_lon, max_lon))
+    else:
+        query = query.filter(or_(model.longitude >= min_lon, model.longitude <= max_lon))
+
+    rows = query.all()
+    if not rows:
+        return []
+
+    distances = haversine_distances(
+        lat, lon,
+        [row.latitude for row in rows],
+        [row.longitude for row in rows]
+    )
+    order, dists = top_k(distances, None, radius_km)
+    return [(rows[i], float(d)) for i, d in zip(order, dists)]
+
+def parse_radius_args(args):
+    """
+    Read lat/lng/radiusKm query parameters
+
+    Args:
+        args: request.args
+
+    Returns:
+        (lat, lng, radius_km) when a radius search was requested, else None
+
+    Raises:
+        ValueError: If the parameters are incomplete or not numbers
+    """
+    raw = (args.get("lat"), args.get("lng"), args.get("radiusKm"))
+    if not any(raw):
+        return None
+    if not all(raw):
+        raise ValueError("lat, lng and radiusKm are required for a radius search")
+    lat, lng, radius_km = (float(v) for v in raw)
+    if not is_valid_point(lat, lng) or not (math.isfinite(radius_km) and radius_km > 0):
+        raise ValueError("lat, lng or radiusKm out of range")
+    return lat, lng, radius_km
+
+def is_valid_point(lat, lng):
+    """True for finite coordinates with lat in [-90, 90] and lng in [-180, 180]"""
+    return (
+        math.isfinite(lat) and math.isfinite(lng)
+        and -90 <= lat <= 90 and -180 <= lng <= 180
+    )
+
+def parse_point(latitude, longitude):
+    """
+    Read optional coordinates from a request body
+
+    Args:
+        latitude, longitude: Raw JSON values; None or "" means not given
+
+    Returns:
+        (lat, lng) as floats, or (None, None) when neither is given
+
+    Raises:
+        ValueError: If only one is given, either is not a number, or the
+            point is not finite and in range
+    """
+    has_lat = latitude not in (None, "")
+    has_lng = longitude not in (None, "")
+    if not has_lat and not has_lng:
+        return None, None
+    if has_lat != has_lng:
+        raise ValueError("latitude and longitude must be sent together")
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError("latitude and longitude must be numbers")
+    if not is_valid_point(lat, lng):
+        raise ValueError("latitude/longitude out of range")
+    return lat, lng
+
+def parse_nearby_args(args, default_k=20, max_k=100):
+    """
+    Read lat/lng/k/radiusKm query parameters for a k-nearest search
+
+    Args:
+        args: request.args
+        default_k: k when the parameter is absent
+        max_k: Upper clamp for k
+
+    Returns:
+        (lat, lng, k, radius_km); radius_km is None when not given
+
+    Raises:
+        ValueError: If a parameter is missing, not a number or out of range
+    """
+    try:
+        lat = float(args["lat"])
+        lng = float(args["lng"])
+        k = int(args.get("k", default_k))
+        radius_km = float(args["radiusKm"]) if args.get("radiusKm") else None
+    except (KeyError, ValueError):
+        raise ValueError("lat and lng are required numbers")
+    if not is_valid_point(lat, lng):
+        raise ValueError("lat must be within [-90, 90] and lng within [-180, 180]")
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    if radius_km is not None and not (math.isfinite(radius_km) and radius_km > 0):
+        raise ValueError("radiusKm must be a positive number")
+    return lat, lng, min(k, max_k), radius_km
+
+def _item_coordinates(items):
+    """Pull latitude/longitude out of a list of dicts as float arrays"""
+    count = len(items)
+    lats = np.fromiter(
+        (item.get('latitude') if item.get('latitude') is not None else np.nan for item in items),
+        dtype=np.float64, count=count
+    )
+    lons = np.fromiter(
+        (item.get('longitude') if item.get('longitude') is not None else np.nan for item in items),
+        dtype=np.float64, count=count
+    )
+    return lats, lons
+
+def _parse_distance(item):
+    # Extract numeric value from distance string (e.g., "1.2 km" -> 1.2)
+    distance_km = item.get('distanceKm')
+    if distance_km is not None:
+        return distance_km
+    distance_str = item.get('distance', '0 km')
+    try:
+        return float(distance_str.split()[0])
+    except (ValueError, IndexError, AttributeError):
+        return None
+
+def sort_by_distance(items, origin=None):
     """
     Sort array of items by distance
     
     Args:
-        items: List of dictionaries with 'distance' key
+        items: List of dictionaries with 'distanceKm' or 'distance' key,
+            or with 'latitude'/'longitude' keys when origin is given
+        origin: Optional (lat, lon) tuple. When set, distances are computed
+            in one vectorized pass and written to each item as 'distanceKm'.
+            Items without coordinates go last.
     
     Returns:
         Sorted list
     """
+    if origin is not None:
+        if not items:
+            return []
+        lats, lons = _item_coordinates(items)
+        distances = haversine_distances(origin[0], origin[1], lats, lons)
+        # NaN (missing coordinates) sorts to the end under argsort
+        order = np.argsort(distances, kind="stable")
+        result = []
+        for idx in order:
+            item = items[idx]
+            item['distanceKm'] = None if np.isnan(distances[idx]) else float(distances[idx])
+            result.append(item)
+        return result
+
     def get_distance_value(item):
-        # Extract numeric value from distance string (e.g., "1.2 km" -> 1.2)
-        distance_str = item.get('distance', '0 km')
-        try:
-            return float(distance_str.split()[0])
-        except (ValueError, IndexError):
-            return 0
+        distance = _parse_distance(item)
+        return 0 if distance is None else distance
     
     return sorted(items, key=get_distance_value)
 
-def filter_by_radius(items, max_distance_km):
+def filter_by_radius(items, max_distance_km, origin=None):
     """
     Filter items within a certain radius
     
     Args:
-        items: List of dictionaries with 'distance' key
+        items: List of dictionaries with 'distanceKm' or 'distance' key,
+            or with 'latitude'/'longitude' keys when origin is given
         max_distance_km: Maximum distance in kilometers
+        origin: Optional (lat, lon) tuple. When set, distances are computed
+            in one vectorized pass; items without coordinates are dropped.
     
     Returns:
         Filtered list
     """
+    if origin is not None:
+        if not items:
+            return []
+        lats, lons = _item_coordinates(items)
+        distances = haversine_distances(origin[0], origin[1], lats, lons)
+        # Comparisons against NaN are False, so missing coordinates drop out
+        keep = np.flatnonzero(distances <= max_distance_km)
+        filtered = []
+        for idx in keep:
+            item = items[idx]
+            item['distanceKm'] = float(distances[idx])
+            filtered.append(item)
+        return filtered
+
     filtered = []
     for item in items:
-        distance_str = item.get('distance', '0 km')
-        try:
-            distance = float(distance_str.split()[0])
-            if distance <= max_distance_km:
-                filtered.append(item)
-        except (ValueError, IndexError):
-            continue
+        distance = _parse_distance(item)
+        if distance is not None and distance <= max_distance_km:
+            filtered.append(item)
     
     return filtered
 
@@ -0,0 +1,184 @@
+# Request Metrics
+# Per-route latency and SQL histograms exposed in Prometheus text format
+
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from utils.logging_setup import get_logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label tuple"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+class Counter:
+    """Monotonic counter, one series per label tuple"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._series)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{{{_format_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+class RequestMetrics:
+    """
+    Flask + SQLAlchemy instrumentation
+
+    Every request is timed and labelled by its URL rule (not the raw
+    path, so /api/match/<int:recipient_id> stays one series). Cursor
+    events count the statements each request runs and how long the
+    database spent on them; the difference between request latency and
+    SQL time is what serialization and Python cost. Requests issuing more
+    than METRICS_QUERY_THRESHOLD statements are counted and logged as
+    likely N+1 patterns.
+    """
+
+    def __init__(self):
+        labels = ("method", "route", "status")
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency by route", labels, LATENCY_BUCKETS)
+        self.sql_time = Histogram(
+            "http_request_sql_seconds", "Time spent in SQL per request", labels, LATENCY_BUCKETS)
+        self.query_count = Histogram(
+            "http_request_sql_queries", "SQL statements per request", labels, QUERY_COUNT_BUCKETS)
+        self.excessive = Counter(
+            "http_request_excessive_queries_total",
+            "Requests that exceeded the per-request query threshold", ("method", "route"))
+        self.query_threshold = 20
+        self._collectors = []
+        self._engine_hooked = False
+        self.logger = get_logger("metrics")
+
+    def init_app(self, app):
+        self.query_threshold = app.config.get("METRICS_QUERY_THRESHOLD", 20)
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+
+        # Listening on the Engine class covers every engine flask-sqlalchemy
+        # creates for this app, including ones built after init_app runs
+        if not self._engine_hooked:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            self._engine_hooked = True
+
+        app.before_request(_start_request)
+        app.after_request(self._finish_request)
+
+    def add_collector(self, collector):
+        """Register a callable returning extra Prometheus text lines"""
+        self._collectors.append(collector)
+
+    def _finish_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        labels = (request.method, route, str(response.status_code))
+        queries = g.get("metrics_queries", 0)
+
+        self.latency.observe(labels, elapsed)
+        self.sql_time.observe(labels, g.get("metrics_sql_seconds", 0.0))
+        self.query_count.observe(labels, queries)
+
+        if queries > self.query_threshold:
+            self.excessive.inc((request.method, route))
+            self.logger.warning("query threshold exceeded", extra={"fields": {
+                "route": route,
+                "method": request.method,
+                "queries": queries,
+                "threshold": self.query_threshold,
+            }})
+        return response
+
+    def render(self):
+        lines = []
+        for metric in (self.latency, self.sql_time, self.query_count, self.excessive):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def response(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_sql_seconds = 0.0
+
+# The start time rides on the execution context, which is dropped with
+# the statement. (conn.info outlives it: a statement that raised never
+# reached after_cursor_execute and its entry was never popped.)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context():
+        context._metrics_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None or not has_request_context():
+        return
+    elapsed = time.perf_counter() - start
+    if "metrics_started" in g:
+        g.metrics_queries += 1
+        g.metrics_sql_seconds += elapsed
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,89 @@
+# Pagination Helpers
+# Opaque keyset cursors for (created_at, id) ordered listings
+
+import base64
+import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(created_at, row_id):
+    """
+    Build an opaque cursor pointing just past a row
+
+    Args:
+        created_at: created_at of the last row on the page
+        row_id: id of the last row on the page
+
+    Returns:
+        URL-safe string
+    """
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """
+    Reverse encode_cursor
+
+    Returns:
+        Tuple (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def get_page_size(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    Read the limit query parameter, clamped to [1, maximum]
+
+    Raises:
+        ValueError: If limit is not a number
+    """
+    raw = args.get("limit")
+    if not raw:
+        return default
+    return max(1, min(int(raw), maximum))
+
+def keyset_page(query, model, cursor, limit):
+    """
+    Fetch one page of rows ordered newest first
+
+    Rows are ordered by (created_at DESC, id DESC) and the cursor is
+    applied as a range predicate on the same columns, so each page is an
+    index range scan no matter how deep the client pages.
+
+    Args:
+        query: SQLAlchemy query over model (filters already applied)
+        model: Model class with created_at and id columns
+        cursor: Cursor string from a previous page, or None
+        limit: Page size, or None for every remaining row
+
+    Returns:
+        Tuple (rows, next_cursor). next_cursor is None on the last page.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if limit is None:
+        return query.all(), None
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,79 @@
+# Password Hashing Pool
+# Runs bcrypt on a bounded worker pool with admission control
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class HashingPoolBusy(Exception):
+    """Raised when the pool is saturated and the request should back off"""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+class HashingPool:
+    """
+    Bounded executor for bcrypt work
+
+    At most `workers` hashes run at once and at most `queue_limit` more
+    wait for a slot. Anything beyond that is refused immediately with
+    HashingPoolBusy, so a login storm cannot tie up every request thread
+    and starve cheap endpoints like /api/ping.
+    """
+
+    def __init__(self, workers=None, queue_limit=None, retry_after=2):
+        self._configure(workers, queue_limit, retry_after)
+
+    def _configure(self, workers, queue_limit, retry_after):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.queue_limit = self.workers * 4 if queue_limit is None else queue_limit
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.rejected = 0
+
+    def init_app(self, app):
+        config = app.config
+        self._configure(
+            config.get("PASSWORD_HASH_WORKERS"),
+            config.get("PASSWORD_HASH_QUEUE_LIMIT"),
+            config.get("PASSWORD_HASH_RETRY_AFTER", 2),
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="bcrypt"
+                    )
+        return self._executor
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool and wait for the result
+
+        Raises:
+            HashingPoolBusy: If every worker and queue slot is taken
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingPoolBusy(self.retry_after)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+def hash_cost(pw_hash):
+    """Cost factor encoded in a bcrypt hash ("$2b$12$..." -> 12)"""
+    try:
+        return int(pw_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+password_pool = HashingPool()
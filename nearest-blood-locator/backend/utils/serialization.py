@@ -0,0 +1,177 @@
+# Serialization
+# Column-projected row serialization and a fast JSON response path
+
+import datetime
+import itertools
+import json
+
+from flask import current_app, request, Response, stream_with_context
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+class RowSerializer:
+    """
+    Serialize list-endpoint rows without building ORM objects
+
+    Selects only the columns a model's to_dict() needs, as plain tuples,
+    so rows skip the identity map and attribute instrumentation. Each row
+    is zipped straight into a dict; only keys with a converter, or keys
+    sharing another key's column, are touched afterwards. Datetimes are
+    left for the JSON encoder.
+    """
+
+    def __init__(self, fields, hidden=()):
+        """
+        Args:
+            fields: List of (json_key, model column[, convert]) tuples.
+                Keys may share a column; it is selected once.
+            hidden: Columns selected after the emitted ones but left out
+                of the dicts (e.g. keyset pagination columns)
+        """
+        self.fields = [tuple(field) + (None,) * (3 - len(field)) for field in fields]
+        self.hidden = tuple(hidden)
+
+        columns, keys, aliases, converters = [], [], [], []
+        key_for_column = {}
+        for key, column, convert in self.fields:
+            source = key_for_column.get(column.key)
+            if source is not None:
+                aliases.append((key, source, convert))
+                continue
+            key_for_column[column.key] = key
+            columns.append(column)
+            keys.append(key)
+            if convert is not None:
+                converters.append((key, convert))
+        for column in self.hidden:
+            if column.key not in key_for_column:
+                key_for_column[column.key] = None
+                columns.append(column)
+
+        self.columns = tuple(columns)
+        self.keys = tuple(keys)  # zip() stops here, dropping hidden columns
+        self._aliases = aliases
+        self._converters = converters
+        self._by_name = {key.lower(): key for key, _, _ in self.fields}
+
+    def only(self, names, hidden=()):
+        """
+        Narrow to a sparse fieldset
+
+        Args:
+            names: Requested JSON keys (case-insensitive), or None for all
+            hidden: Extra columns to select without emitting
+
+        Raises:
+            ValueError: If a name is not one of this serializer's keys
+        """
+        if not names and not hidden:
+            return self
+        if names:
+            unknown = [name for name in names if name.lower() not in self._by_name]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            wanted = {self._by_name[name.lower()] for name in names}
+            fields = [field for field in self.fields if field[0] in wanted]
+        else:
+            fields = self.fields
+        return RowSerializer(fields, self.hidden + tuple(hidden))
+
+    def select(self, query):
+        """Narrow an ORM query over the model to this projection"""
+        return query.with_entities(*self.columns)
+
+    def _finish(self, item):
+        for key, source, convert in self._aliases:
+            item[key] = convert(item[source]) if convert else item[source]
+        for key, convert in self._converters:
+            item[key] = convert(item[key])
+        return item
+
+    def to_dicts(self, rows):
+        keys = self.keys
+        items = [dict(zip(keys, row)) for row in rows]
+        if self._aliases or self._converters:
+            for item in items:
+                self._finish(item)
+        return items
+
+    def serialize(self, query):
+        return self.to_dicts(self.select(query).all())
+
+    def stream(self, query, batch_size=500):
+        """
+        Yield dicts while the result is still being read
+
+        yield_per() turns on stream_results, so the driver reads through a
+        server-side cursor batch_size rows at a time instead of buffering
+        the whole result set.
+        """
+        keys = self.keys
+        finish = self._aliases or self._converters
+        for row in self.select(query).yield_per(batch_size):
+            item = dict(zip(keys, row))
+            yield self._finish(item) if finish else item
+
+def parse_fields(args):
+    """
+    Read the fields= query parameter ("id,name,bloodGroup")
+
+    Returns:
+        List of field names, or None when the parameter is absent
+    """
+    raw = args.get("fields", "")
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    return names or None
+
+def use_fast_path():
+    """
+    True when this request should use RowSerializer + json_response
+
+    FAST_SERIALIZATION turns the path on for the app; a client can still
+    ask for the ORM path with "X-Serializer: orm", e.g. to compare output.
+    """
+    if not current_app.config.get("FAST_SERIALIZATION", True):
+        return False
+    return request.headers.get("X-Serializer", "").lower() != "orm"
+
+NDJSON = "application/x-ndjson"
+
+def wants_ndjson():
+    """True when the client prefers newline-delimited JSON over an array"""
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+def _default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload):
+    """Encode to JSON bytes with sorted keys, matching jsonify's output"""
+    if orjson is not None:
+        # orjson writes naive datetimes in the same form as isoformat()
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(payload, default=_default, sort_keys=True, separators=(",", ":")).encode()
+
+def json_response(payload):
+    return Response(dumps(payload), mimetype="application/json")
+
+def ndjson_response(items, lines_per_chunk=200):
+    """
+    Stream an iterable of dicts as one JSON document per line
+
+    Lines are grouped into chunks so the server writes a few large
+    chunks rather than one per row.
+    """
+    def generate():
+        items_iter = iter(items)
+        while True:
+            chunk = list(itertools.islice(items_iter, lines_per_chunk))
+            if not chunk:
+                return
+            yield b"".join(dumps(item) + b"\n" for item in chunk)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON)
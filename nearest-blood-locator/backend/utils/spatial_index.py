@@ -0,0 +1,276 @@
+# Spatial Index
+# In-memory grid index over donor and blood bank coordinates
+
+import math
+import threading
+import time
+
+import numpy as np
+
+from models import Donor, BloodBank
+from utils.location_helper import EARTH_RADIUS_KM, haversine_distances, top_k
+
+KM_PER_DEGREE_LAT = 111.32
+
+class GridIndex:
+    """
+    Bucket points into fixed-size lat/lon grid cells
+
+    Radius queries only touch the cells overlapping the search circle's
+    bounding box, then run exact Haversine on the points in those cells.
+    k-nearest queries grow the search radius until k points are found.
+    """
+
+    def __init__(self, cell_size_deg=0.1):
+        self.cell_size_deg = cell_size_deg
+        self._lon_cells = int(math.ceil(360 / cell_size_deg))
+        self._cells = {}      # (row, col) -> {key: (lat, lon)}
+        self._positions = {}  # key -> (row, col)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def _cell_for(self, lat, lon):
+        row = int(math.floor(lat / self.cell_size_deg))
+        col = int(math.floor((lon + 180) / self.cell_size_deg)) % self._lon_cells
+        return row, col
+
+    def upsert(self, key, lat, lon):
+        """Insert or move a point. Missing coordinates remove it instead."""
+        if lat is None or lon is None:
+            self.remove(key)
+            return
+
+        lat, lon = float(lat), float(lon)
+        cell = self._cell_for(lat, lon)
+        with self._lock:
+            old_cell = self._positions.get(key)
+            if old_cell is not None and old_cell != cell:
+                self._discard(key, old_cell)
+            self._cells.setdefault(cell, {})[key] = (lat, lon)
+            self._positions[key] = cell
+
+    def remove(self, key):
+        with self._lock:
+            cell = self._positions.pop(key, None)
+            if cell is not None:
+                self._discard(key, cell)
+
+    def _discard(self, key, cell):
+        bucket = self._cells.get(cell)
+        if bucket is None:
+            return
+        bucket.pop(key, None)
+        if not bucket:
+            del self._cells[cell]
+
+    def clear(self):
+        with self._lock:
+            self._cells = {}
+            self._positions = {}
+
+    def bulk_load(self, rows):
+        """
+        Replace the index contents
+
+        Args:
+            rows: Iterable of (key, lat, lon) tuples
+        """
+        rows = [row for row in rows if row[1] is not None and row[2] is not None]
+        cells = {}
+        positions = {}
+        if rows:
+            keys, lats, lons = zip(*rows)
+            lats = np.asarray(lats, dtype=np.float64)
+            lons = np.asarray(lons, dtype=np.float64)
+            cell_rows = np.floor(lats / self.cell_size_deg).astype(np.int64).tolist()
+            cell_cols = (
+                np.floor((lons + 180) / self.cell_size_deg).astype(np.int64) % self._lon_cells
+            ).tolist()
+            for key, lat, lon, cell in zip(keys, lats.tolist(), lons.tolist(), zip(cell_rows, cell_cols)):
+                bucket = cells.get(cell)
+                if bucket is None:
+                    bucket = cells[cell] = {}
+                bucket[key] = (lat, lon)
+                positions[key] = cell
+
+        with self._lock:
+            self._cells = cells
+            self._positions = positions
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        """Cells overlapping the bounding box of the search circle"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        lat_lo = max(lat - dlat, -90.0)
+        lat_hi = min(lat + dlat, 90.0)
+        row_lo = int(math.floor(lat_lo / self.cell_size_deg))
+        row_hi = int(math.floor(lat_hi / self.cell_size_deg))
+
+        widest = max(abs(lat_lo), abs(lat_hi))
+        cos_lat = math.cos(math.radians(widest))
+        if lat_hi >= 90.0 or lat_lo <= -90.0 or cos_lat <= 1e-9:
+            all_cols = True
+        else:
+            dlon = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+            all_cols = dlon >= 180.0
+
+        if all_cols:
+            n_cols = self._lon_cells
+        else:
+            col_lo = int(math.floor((lon - dlon + 180) / self.cell_size_deg))
+            col_hi = int(math.floor((lon + dlon + 180) / self.cell_size_deg))
+            n_cols = col_hi - col_lo + 1
+
+        # When the box covers more cells than are occupied, walking the
+        # occupied cells is cheaper than probing empty ones.
+        if (row_hi - row_lo + 1) * n_cols >= len(self._cells):
+            return [
+                cell for cell in self._cells
+                if row_lo <= cell[0] <= row_hi
+            ]
+
+        if all_cols:
+            cols = range(self._lon_cells)
+        else:
+            cols = [c % self._lon_cells for c in range(col_lo, col_hi + 1)]
+        return [
+            (row, col)
+            for row in range(row_lo, row_hi + 1)
+            for col in cols
+            if (row, col) in self._cells
+        ]
+
+    def _gather(self, cells):
+        keys = []
+        coords = []
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket:
+                keys.extend(bucket.keys())
+                coords.extend(bucket.values())
+        if not coords:
+            return keys, np.empty(0), np.empty(0)
+        arr = np.asarray(coords, dtype=np.float64)
+        return keys, arr[:, 0], arr[:, 1]
+
+    def within_radius(self, lat, lon, radius_km, k=None):
+        """
+        Find points within radius_km of (lat, lon)
+
+        Returns:
+            List of (key, distance_km) tuples, closest first
+        """
+        with self._lock:
+            keys, lats, lons = self._gather(self._candidate_cells(lat, lon, radius_km))
+        if not keys:
+            return []
+        distances = haversine_distances(lat, lon, lats, lons)
+        order, dists = top_k(distances, k, radius_km)
+        return [(keys[i], float(d)) for i, d in zip(order, dists)]
+
+    def nearest(self, lat, lon, k, max_distance_km=None):
+        """
+        Find the k closest points to (lat, lon)
+
+        Returns:
+            List of (key, distance_km) tuples, closest first
+        """
+        if k <= 0 or not self._positions:
+            return []
+
+        # Half the Earth's circumference covers every point
+        limit = math.pi * EARTH_RADIUS_KM
+        if max_distance_km is not None:
+            limit = min(limit, max_distance_km)
+
+        radius = min(self.cell_size_deg * KM_PER_DEGREE_LAT, limit)
+        while True:
+            hits = self.within_radius(lat, lon, radius, k)
+            # Every point within `radius` was examined, so once k of them
+            # are found the k closest overall are among them.
+            if len(hits) >= k or radius >= limit:
+                return hits
+            radius = min(radius * 2, limit)
+
+class ModelSpatialIndex(GridIndex):
+    """
+    Grid index backed by the latitude/longitude columns of a model
+
+    The index is built lazily from the database on first use and rebuilt
+    after max_age_seconds, so workers that did not see a write still
+    converge. Writes made through this process are applied immediately
+    via upsert/remove.
+    """
+
+    def __init__(self, model, cell_size_deg=0.1, max_age_seconds=300):
+        super().__init__(cell_size_deg)
+        self.model = model
+        self.max_age_seconds = max_age_seconds
+        self._loaded_at = None
+
+    def ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.max_age_seconds:
+            return
+        model = self.model
+        rows = (
+            model.query
+            .with_entities(model.id, model.latitude, model.longitude)
+            .filter(model.latitude.isnot(None), model.longitude.isnot(None))
+            .all()
+        )
+        self.bulk_load(rows)
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def within_radius(self, lat, lon, radius_km, k=None):
+        self.ensure_loaded()
+        return super().within_radius(lat, lon, radius_km, k)
+
+    def nearest(self, lat, lon, k, max_distance_km=None):
+        self.ensure_loaded()
+        return super().nearest(lat, lon, k, max_distance_km)
+
+def nearest_matching(index, lat, lon, k, radius_km=None, fetch_rows=None, max_candidates=None):
+    """
+    k-nearest search that also applies non-spatial filters
+
+    Grows the candidate set until k of the nearest points survive
+    fetch_rows, so filtering never drops a closer match. Growth stops at
+    the size of the index, or at max_candidates, so a filter matching
+    few rows costs at most one bounded scan rather than ever larger ones.
+
+    Args:
+        index: A GridIndex
+        lat, lon: Search origin
+        k: Number of results wanted
+        radius_km: Optional maximum distance
+        fetch_rows: Callable taking a list of keys and returning a dict
+            of key -> row for those that pass the filters
+        max_candidates: Optional cap on the points examined; fewer than
+            k results may come back once it is reached
+
+    Returns:
+        List of (row, distance_km) tuples, closest first
+    """
+    fetch = k
+    while True:
+        if radius_km is not None:
+            hits = index.within_radius(lat, lon, radius_km, fetch)
+        else:
+            hits = index.nearest(lat, lon, fetch)
+        rows = fetch_rows([key for key, _ in hits])
+        matched = [(rows[key], dist) for key, dist in hits if key in rows]
+        limit = len(index) if max_candidates is None else min(len(index), max_candidates)
+        if len(matched) >= k or len(hits) < fetch or fetch >= limit:
+            return matched[:k]
+        fetch = min(fetch * 4, limit)
+
+donor_index = ModelSpatialIndex(Donor)
+blood_bank_index = ModelSpatialIndex(BloodBank)
@@ -0,0 +1,41 @@
+# SQL Helpers
+# Dialect-aware statements shared by the models
+
+from sqlalchemy.dialects import mysql, sqlite
+from extensions import db
+
+def upsert(model, rows, conflict_columns, build_update):
+    """
+    Build a multi-row INSERT that updates rows hitting a unique key
+
+    Args:
+        model: Model class to insert into
+        rows: List of column -> value dicts
+        conflict_columns: Columns of the unique key (used by SQLite)
+        build_update: Callable receiving the incoming-row namespace
+            (inserted / excluded) and returning a dict of column -> value
+            to apply on conflict
+
+    Returns:
+        Statement for db.session.execute
+    """
+    if db.session.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(model).values(rows)
+        return stmt.on_duplicate_key_update(**build_update(stmt.inserted))
+
+    # SQLite speaks ON CONFLICT
+    stmt = sqlite.insert(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_=build_update(stmt.excluded)
+    )
+
+def precise_datetime():
+    """
+    DATETIME keeping microseconds on MySQL
+
+    Plain DATETIME rounds to the second there, so two writes in the same
+    second would leave an updated_at watermark (see utils.conditional)
+    unchanged. SQLite already stores the full value.
+    """
+    return db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
@@ -102,10 +102,11 @@ export default function DonorDashboard() {
 
                     try {
                         const response = await fetch(
-                            `https://nominatim.openstreetmap.org/reverse?lat=${latitude}&lon=${longitude}&format=json`
+                            `${API_URL}/geo/reverse?lat=${latitude}&lon=${longitude}`
                         );
                         const data = await response.json();
-                        const city = data.address.city || data.address.town || data.address.village || '';
+                        // Offline gazetteer on our backend; 404 when no city is nearby
+                        const city = response.ok ? data.city : '';
                         setDonorData(prev => ({
                             ...prev,
                             city: city,
@@ -106,14 +106,11 @@ export default function Register() {
 
           try {
             const response = await fetch(
-              `https://nominatim.openstreetmap.org/reverse?lat=${latitude}&lon=${longitude}&format=json`
+              `${API_URL}/geo/reverse?lat=${latitude}&lon=${longitude}`
             );
             const data = await response.json();
-            const city = data.address.city ||
-              data.address.town ||
-              data.address.village ||
-              data.address.county ||
-              '';
+            // Offline gazetteer on our backend; 404 when no city is nearby
+            const city = response.ok ? data.city : '';
 
             setFormData(prev => ({
               ...prev,